@@ -0,0 +1,291 @@
+"""
+Замеры производительности загрузки, обработки данных и функций построения графиков.
+
+Запуск из корня проекта:
+    python -m benchmarks.run_benchmarks --sizes 10k 100k --output results.json
+    python -m benchmarks.run_benchmarks --sizes 10k --compare old_results.json
+
+Данные создаются генератором benchmarks.synthetic (формат data/financial2023.csv)
+и сохраняются в каталоге --data-dir, поэтому повторные запуски используют те же файлы.
+Для каждого замера в JSON записываются время (минимум из --repeat запусков) и пиковый
+объем памяти, выделенной во время замера (tracemalloc, отдельный запуск).
+Построители на данных больше --max-builder-rows строк пропускаются (запись со статусом 'skipped');
+чтобы замерить их на любом объеме, добавьте --all-builders.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')  # графики строятся без окон
+
+import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+
+from benchmarks.synthetic import dataset_path
+from source import data_cache, registry
+from source.data_processing import load_data, process_data, process_all_data, ColumnIndex, project, optimize_dtypes
+from source.summaries import DatasetSummaries
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+BUILDER_MODULES = ('source.visualizations_max', 'source.visualizations6')
+XLSX_MAX_ROWS = 100_000  # большие xlsx создаются слишком долго, а больше 1 048 576 строк Excel не поддерживает
+MAX_BUILDER_ROWS = 200_000  # построители на большем объеме данных пропускаются (см. --max-builder-rows, --all-builders)
+COLUMNS = {'x': 'industry_code_ANZSIC', 'y': 'value', 'z': 'value'}  # столбцы графиков, как в окне приложения
+CONTOUR_COLUMNS = {'x': 'year', 'y': 'value', 'z': 'value'}  # контурным графикам нужны числовые X, Y, Z
+X_FILTER_VALUE = 'A'  # фильтр по X для графиков, строящихся по выборке
+
+
+def parse_size(text):
+    """
+    :param text: Размер, например '100k', '1M' или '5000'.
+    :return: число строк
+    """
+    if text in SIZES:
+        return SIZES[text]
+    multipliers = {'k': 1_000, 'M': 1_000_000}
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def _render_and_close(*args, **kwargs):
+    # Замена plt.show: отрисовка всех открытых фигур в Agg и их закрытие
+    for number in plt.get_fignums():
+        plt.figure(number).canvas.draw()
+    plt.close('all')
+
+
+def _serialize(fig, *args, **kwargs):
+    # Замена Figure.show для Plotly: сериализация фигуры, как при передаче в браузер
+    fig.to_json()
+
+
+class Headless:
+    """
+    Контекст, в котором графики отрисовываются без окон: plt.show рисует фигуры в Agg,
+    fig.show() у Plotly только сериализует фигуру в JSON.
+    """
+
+    def __enter__(self):
+        self._show = plt.show
+        self._figure_show = go.Figure.show
+        plt.show = _render_and_close
+        go.Figure.show = _serialize
+        return self
+
+    def __exit__(self, *exc):
+        plt.show = self._show
+        go.Figure.show = self._figure_show
+        plt.close('all')
+        return False
+
+
+def measure(function, repeat=1, memory=True):
+    """
+    Замеряет время и пиковую память вызова function().
+
+    :param function: Функция без аргументов.
+    :param repeat: Число запусков для замера времени (берется минимум).
+    :param memory: Замерять ли пиковую память (отдельный запуск под tracemalloc).
+    :return: словарь wall_time, times, peak_memory
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'wall_time': min(times), 'times': times, 'peak_memory': peak}
+
+
+def run_case(results, name, rows, function, input_rows=None, repeat=1, memory=True, skip_reason=None):
+    """
+    Выполняет один замер и добавляет запись в results.
+    """
+    record = {'name': name, 'rows': rows, 'input_rows': input_rows if input_rows is not None else rows}
+    if skip_reason:
+        record.update(status='skipped', reason=skip_reason)
+    else:
+        try:
+            record.update(measure(function, repeat, memory), status='ok')
+        except Exception as e:
+            record.update(status='error', error=f"{type(e).__name__}: {e}")
+    results.append(record)
+
+    if record['status'] == 'ok':
+        peak = f", память {record['peak_memory'] / 1024 ** 2:.1f} МБ" if record['peak_memory'] is not None else ''
+        print(f"{name} [{rows}]: {record['wall_time']:.3f} с{peak}")
+    else:
+        print(f"{name} [{rows}]: {record['status']} - {record.get('reason') or record.get('error')}")
+    return record
+
+
+def bench_loaders(results, rows, data_dir, seed, repeat, memory):
+    """
+    Замеры загрузки и обработки данных.
+
+    :return: загруженный DataFrame для замеров построителей
+    """
+    csv_path = dataset_path(rows, data_dir, seed, 'csv')
+    run_case(results, 'load_data[csv]', rows, lambda: load_data(csv_path, use_cache=False), repeat=repeat, memory=memory)
+
+    # Кэш разобранных файлов во временном каталоге, чтобы не затрагивать кэш приложения
+    cache_dir = tempfile.mkdtemp(prefix='diplom_bench_cache_')
+    saved_cache_dir = data_cache.CACHE_DIR
+    data_cache.CACHE_DIR = cache_dir
+    try:
+        load_data(csv_path)  # первый вызов заполняет кэш
+        run_case(results, 'load_data[csv, cached]', rows, lambda: load_data(csv_path), repeat=repeat, memory=memory)
+    finally:
+        data_cache.CACHE_DIR = saved_cache_dir
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if rows <= XLSX_MAX_ROWS:
+        xlsx_path = dataset_path(rows, data_dir, seed, 'xlsx')
+        run_case(results, 'load_data[xlsx]', rows, lambda: load_data(xlsx_path, use_cache=False),
+                 repeat=repeat, memory=memory)
+
+    data = load_data(csv_path, use_cache=False)
+    run_case(results, 'process_data', rows, lambda: process_data(data.copy(), 'value'), repeat=repeat, memory=memory)
+    contour_columns = list(dict.fromkeys(CONTOUR_COLUMNS.values()))
+    run_case(results, 'process_all_data', rows, lambda: process_all_data(project(data, contour_columns)),
+             repeat=repeat, memory=memory)
+
+    # Сводки числовых столбцов: построение по всем строкам и дополнение дописанными строками (1%)
+    optimized = optimize_dtypes(data)
+    appended = optimized.iloc[-max(1, rows // 100):]
+    summaries = DatasetSummaries.from_data(optimized)
+    run_case(results, 'summaries.from_data', rows, lambda: DatasetSummaries.from_data(optimized),
+             repeat=repeat, memory=memory)
+    run_case(results, 'summaries.append[1%]', rows, lambda: summaries.copy().append(appended),
+             repeat=repeat, memory=memory)
+    return data
+
+
+def bench_builders(results, rows, data, repeat, memory, max_builder_rows):
+    """
+    Замеры всех функций построения графиков на данных, подготовленных как в окне приложения.
+    Пропущенные из-за max_builder_rows замеры записываются в результаты со статусом 'skipped'.
+
+    :param max_builder_rows: Максимум входных строк построителя (None - без ограничения).
+    """
+    index = ColumnIndex(data)
+    filtered = project(data, [COLUMNS['x'], COLUMNS['y']], numeric_columns=[COLUMNS['y']],
+                       positions=index.positions(COLUMNS['x'], X_FILTER_VALUE))
+    contour_columns = list(dict.fromkeys(CONTOUR_COLUMNS.values()))
+    contour = process_all_data(project(data, contour_columns))
+
+    for module_name in BUILDER_MODULES:
+        module = importlib.import_module(module_name)
+        short_name = module_name.rsplit('.', 1)[1]
+        for chart in registry.charts():
+            function_name = chart.target.split(':')[1]
+            builder = getattr(module, function_name, None)
+            if builder is None:
+                continue
+            columns = COLUMNS if chart.filtered else CONTOUR_COLUMNS
+            chart_data = filtered if chart.filtered else contour
+            arguments = [columns[axis] for axis in chart.columns]
+            skip = f"входных строк больше {max_builder_rows} (см. --all-builders)" \
+                if max_builder_rows is not None and len(chart_data) > max_builder_rows else None
+            with Headless():
+                run_case(results, f"{short_name}.{function_name}", rows,
+                         lambda: builder(chart_data, *arguments), input_rows=len(chart_data),
+                         repeat=repeat, memory=memory, skip_reason=skip)
+
+
+def environment():
+    """
+    :return: сведения о системе и версиях библиотек для сравнения запусков.
+    """
+    versions = {}
+    for name in ('numpy', 'pandas', 'matplotlib', 'seaborn', 'plotly', 'scipy'):
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {'python': sys.version.split()[0], 'platform': platform.platform(),
+            'processor': platform.processor(), 'cpu_count': os.cpu_count(), 'versions': versions}
+
+
+def compare(results, baseline_path):
+    """
+    Выводит изменение времени относительно предыдущего запуска.
+
+    :param results: Текущие замеры.
+    :param baseline_path: JSON файл предыдущего запуска.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['rows']): r for r in json.load(f)['results'] if r['status'] == 'ok'}
+    print(f"\nСравнение с {baseline_path}:")
+    for record in results:
+        old = baseline.get((record['name'], record['rows']))
+        if old is not None and record['status'] == 'skipped':
+            # сравнение неполное: в прошлом запуске замер был, в этом - пропущен
+            print(f"{record['name']} [{record['rows']}]: {old['wall_time']:.3f} с -> пропущено ({record['reason']})")
+            continue
+        if old is None or record['status'] != 'ok':
+            continue
+        ratio = record['wall_time'] / old['wall_time'] if old['wall_time'] else float('inf')
+        print(f"{record['name']} [{record['rows']}]: {old['wall_time']:.3f} с -> {record['wall_time']:.3f} с "
+              f"(x{ratio:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности загрузки данных и построения графиков")
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES), help="размеры данных: 10k 100k 1M 10M или число строк")
+    parser.add_argument('--output', default=None, help="JSON файл с результатами "
+                                                      "(по умолчанию benchmark_<дата>.json)")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'diplom_benchmarks'),
+                        help="каталог для сгенерированных файлов")
+    parser.add_argument('--seed', type=int, default=0, help="начальное значение генератора данных")
+    parser.add_argument('--repeat', type=int, default=3, help="число запусков каждого замера времени")
+    parser.add_argument('--no-memory', action='store_true', help="не замерять пиковую память")
+    parser.add_argument('--max-builder-rows', type=int, default=MAX_BUILDER_ROWS,
+                        help="пропускать построители, если входных строк больше")
+    parser.add_argument('--all-builders', action='store_true',
+                        help="замерять построители на любом объеме данных (без --max-builder-rows)")
+    parser.add_argument('--skip-builders', action='store_true', help="замерять только загрузку и обработку")
+    parser.add_argument('--compare', default=None, help="JSON файл предыдущего запуска для сравнения")
+    args = parser.parse_args(argv)
+
+    max_builder_rows = None if args.all_builders else args.max_builder_rows
+    results = []
+    for size in args.sizes:
+        rows = parse_size(size)
+        data = bench_loaders(results, rows, args.data_dir, args.seed, args.repeat, not args.no_memory)
+        if not args.skip_builders:
+            bench_builders(results, rows, data, args.repeat, not args.no_memory, max_builder_rows)
+
+    output = args.output or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'seed': args.seed,
+                   'repeat': args.repeat, 'max_builder_rows': max_builder_rows,
+                   'skipped': sum(record['status'] == 'skipped' for record in results),
+                   'environment': environment(), 'results': results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
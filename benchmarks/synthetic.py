@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pds
+
+# Справочники в том виде, в каком они встречаются в data/financial2023.csv
+INDUSTRIES = [
+    ('A', 'Agriculture, Forestry and Fishing'), ('B', 'Mining'), ('C', 'Manufacturing'),
+    ('D', 'Electricity, Gas, Water and Waste Services'), ('E', 'Construction'), ('F', 'Wholesale Trade'),
+    ('G', 'Retail Trade'), ('H', 'Accommodation and Food Services'), ('I', 'Transport, Postal and Warehousing'),
+    ('J', 'Information Media and Telecommunications'), ('K', 'Financial and Insurance Services'),
+    ('L', 'Rental, Hiring and Real Estate Services'), ('M', 'Professional, Scientific and Technical Services'),
+    ('N', 'Administrative and Support Services'), ('O', 'Public Administration and Safety'),
+    ('P', 'Education and Training'), ('Q', 'Health Care and Social Assistance'),
+    ('R', 'Arts and Recreation Services'), ('S', 'Other Services'), ('all', 'All Industries'),
+]
+SIZE_GROUPS = ['a_0', 'b_1-5', 'c_6-9', 'd_10-19', 'e_20-49', 'f_50-99', 'g_100-199', 'h_200+',
+               'i_Industry_Total', 'j_Grand_Total']
+VARIABLES = [
+    ('Activity unit', 'COUNT'), ('Rolling mean employees', 'COUNT'), ('Salaries and wages paid', 'DOLLARS(millions)'),
+    ('Sales, government funding, grants and subsidies', 'DOLLARS(millions)'), ('Total income', 'DOLLARS(millions)'),
+    ('Total expenditure', 'DOLLARS(millions)'), ('Operating profit before tax', 'DOLLARS(millions)'),
+    ('Total assets', 'DOLLARS(millions)'), ('Fixed tangible assets', 'DOLLARS(millions)'),
+]
+FIRST_YEAR = 2011
+CONFIDENTIAL_SHARE = 0.02  # доля скрытых значений 'C', как в исходных данных (~1.9%)
+COLUMNS = ['year', 'industry_code_ANZSIC', 'industry_name_ANZSIC', 'rme_size_grp', 'variable', 'value', 'unit']
+
+
+def generate(rows, seed=0):
+    """
+    Создает таблицу в формате data/financial2023.csv заданного размера.
+
+    Строки перебирают все сочетания отрасль x размер x показатель, год увеличивается,
+    когда сочетания заканчиваются. Значения - целые числа с логнормальным распределением,
+    часть значений заменена маркером 'C', поэтому столбец value строковый, как в исходном файле.
+
+    :param rows: Число строк.
+    :param seed: Начальное значение генератора случайных чисел (одинаковый seed - одинаковые данные).
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    per_year = len(INDUSTRIES) * len(SIZE_GROUPS) * len(VARIABLES)
+    row = np.arange(rows)
+    year, rest = np.divmod(row, per_year)
+    industry, rest = np.divmod(rest, len(SIZE_GROUPS) * len(VARIABLES))
+    size_group, variable = np.divmod(rest, len(VARIABLES))
+
+    codes = np.array([code for code, _ in INDUSTRIES], dtype=object)
+    names = np.array([name for _, name in INDUSTRIES], dtype=object)
+    variable_names = np.array([name for name, _ in VARIABLES], dtype=object)
+    units = np.array([unit for _, unit in VARIABLES], dtype=object)
+
+    values = np.round(rng.lognormal(mean=7, sigma=2, size=rows)).astype(np.int64).astype(str).astype(object)
+    values[rng.random(rows) < CONFIDENTIAL_SHARE] = 'C'
+
+    return pds.DataFrame({
+        'year': FIRST_YEAR + year,
+        'industry_code_ANZSIC': codes[industry],
+        'industry_name_ANZSIC': names[industry],
+        'rme_size_grp': np.array(SIZE_GROUPS, dtype=object)[size_group],
+        'variable': variable_names[variable],
+        'value': values,
+        'unit': units[variable],
+    }, columns=COLUMNS)
+
+
+def dataset_path(rows, data_dir, seed=0, fmt='csv'):
+    """
+    Возвращает путь к синтетическому файлу, создавая его при первом обращении.
+
+    :param rows: Число строк.
+    :param data_dir: Каталог для сгенерированных файлов.
+    :param seed: Начальное значение генератора.
+    :param fmt: 'csv' или 'xlsx'.
+    :return: путь к файлу
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"financial_{rows}_seed{seed}.{fmt}")
+    if not os.path.exists(path):
+        data = generate(rows, seed)
+        tmp = os.path.join(data_dir, f"financial_{rows}_seed{seed}.tmp.{fmt}")  # файл появляется только целиком
+        if fmt == 'csv':
+            data.to_csv(tmp, index=False)
+        elif fmt == 'xlsx':
+            data.to_excel(tmp, index=False, engine='openpyxl')
+        else:
+            raise ValueError(f"Неподдерживаемый формат: {fmt}")
+        os.replace(tmp, path)
+    return path
@@ -0,0 +1,34 @@
+import argparse
+import sys
+import time
+from source.batch_export import read_specs, export_charts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Выгрузка графиков в файлы без запуска окна приложения")
+    parser.add_argument('data_file', help="файл с данными (xlsx или csv)")
+    parser.add_argument('spec_file', help="JSON файл со списком графиков "
+                                          "(library, plot_type, x, y, z, filter, format, name)")
+    parser.add_argument('output_dir', help="каталог для файлов графиков")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="число процессов (по умолчанию - по числу ядер)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    specs = read_specs(args.spec_file)
+    results = export_charts(args.data_file, specs, args.output_dir, workers=args.jobs)
+
+    failed = 0
+    for path, seconds, error in sorted(results):
+        if error is None:
+            print(f"{path}: {seconds:.2f} с")
+        else:
+            failed += 1
+            print(f"Ошибка при построении {path}: {error}")
+    print(f"Готово: {len(results) - failed} из {len(results)} графиков за {time.perf_counter() - start:.2f} с")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,45 @@
+import time
+start_time = time.perf_counter()  # отсчет времени запуска для отчета
+
 import sys
+from PyQt5.QtCore import QTimer, Qt, QCoreApplication
 from PyQt5.QtWidgets import QApplication  # pyqt5 аналог tkinter, но посовременнее и удобнее. создадим диалоговое окно
 from source.gui import MainWindow # gui импортируем из написанного файла
+from source.lazy_import import prewarm
+
+imports_time = time.perf_counter()
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'plotly', 'scipy')  # библиотеки, которые загружаются отложенно
+# модули построителей графиков: при запуске они еще не созданы через lazy_module (реестр импортирует
+# построители только при первом графике), поэтому для фоновой загрузки их имена задаются явно
+PREWARM_MODULES = ('matplotlib.pyplot', 'seaborn', 'plotly.graph_objects', 'plotly.express', 'scipy.spatial')
+
+
+def report_startup():
+    # вызывается после первой отрисовки окна, когда цикл обработки событий уже запущен
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"Время запуска: импорт {imports_time - start_time:.2f} с, "
+          f"окно отображено через {time.perf_counter() - start_time:.2f} с, "
+          f"загружено библиотек графиков: {', '.join(loaded) if loaded else 'нет'}")
+    # загружаем библиотеки графиков в фоне, пока пользователь выбирает файл
+    report_prewarm(prewarm(PREWARM_MODULES), time.perf_counter())
+
+
+def report_prewarm(thread, started):
+    # ждет завершения фоновой загрузки, не блокируя окно, и сообщает, что загружено
+    if thread.is_alive():
+        QTimer.singleShot(100, lambda: report_prewarm(thread, started))
+        return
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"В фоне за {time.perf_counter() - started:.2f} с загружены библиотеки графиков: "
+          f"{', '.join(loaded) if loaded else 'нет'}")
+
 
 if __name__ == "__main__":
+    # позволяет загрузить QtWebEngine (встроенные графики Plotly) уже после создания приложения
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)  # создаем объект для управления приложением,
                                   # sys.argv передает аргументы командной строки
     window = MainWindow()  # главное окно приложения
     window.show()  # отображение главного окна
+    QTimer.singleShot(0, report_startup)  # отчет о времени запуска после первой отрисовки
     sys.exit(app.exec_())  # запуск цикла обработки событий(нажатие кнопок и т.п.) и завершение приложения
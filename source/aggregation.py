@@ -0,0 +1,132 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pds
+
+REDUCERS = ('sum', 'mean', 'median', 'count', 'min', 'max')
+NO_AGGREGATION = 'none'  # строки передаются построителю без агрегации
+AGGREGATION_CACHE_SIZE = 16  # сколько группировок хранится для повторного использования
+
+
+class GroupedValues:
+    """
+    Частичная агрегация: значения Y, упорядоченные по группам (X и, если задан, столбец серий)
+    и по возрастанию внутри группы. Строится один раз, после чего любая сводка
+    (сумма, среднее, медиана, число, минимум, максимум) вычисляется за O(число групп).
+    """
+
+    def __init__(self, data, x_column, y_column, series_column=None):
+        """
+        :param data: DataFrame с числовым столбцом Y.
+        :param x_column: Столбец группировки.
+        :param y_column: Столбец значений.
+        :param series_column: Дополнительный столбец группировки (серии) или None.
+        """
+        self.x_column, self.y_column, self.series_column = x_column, y_column, series_column
+        group_columns = [x_column] if series_column in (None, x_column) else [x_column, series_column]
+
+        groups = None
+        valid = np.ones(len(data), dtype=bool)
+        for column in group_columns:
+            codes, uniques = pds.factorize(data[column])
+            valid &= codes >= 0  # строки с пропуском в столбце группировки не входят ни в одну группу
+            groups = codes.astype(np.int64) if groups is None else groups * len(uniques) + codes
+        # сумма, минимум и максимум целых значений остаются целыми (подписи без «.0»)
+        self._integral = (pds.api.types.is_integer_dtype(data[y_column].dtype)
+                          or pds.api.types.is_bool_dtype(data[y_column].dtype))
+        y = data[y_column].to_numpy(dtype=float)
+        valid &= ~np.isnan(y)
+        rows = np.flatnonzero(valid)
+        # группы нумеруются в порядке появления, как категории на графиках (см. CategoryGroups)
+        groups, _ = pds.factorize(groups[rows])
+
+        order = np.lexsort((y[rows], groups))
+        self._values = y[rows][order]
+        self.counts = np.bincount(groups, minlength=groups.max() + 1 if len(groups) else 0)
+        self._starts = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64)
+        first_rows = rows[order][self._starts] if len(rows) else rows
+        self.keys = {column: data[column].iloc[first_rows].reset_index(drop=True) for column in group_columns}
+        self._results = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def reduce(self, reducer):
+        """
+        :param reducer: Одна из REDUCERS.
+        :return: массив значений сводки для каждой группы
+        """
+        result = self._results.get(reducer)
+        if result is not None:
+            return result
+        if not len(self.counts):
+            result = np.empty(0)
+        elif reducer == 'count':
+            result = self.counts
+        elif reducer == 'sum':
+            result = np.add.reduceat(self._values, self._starts)
+        elif reducer == 'mean':
+            result = self.reduce('sum') / self.counts
+        elif reducer == 'min':
+            result = self._values[self._starts]
+        elif reducer == 'max':
+            result = self._values[self._starts + self.counts - 1]
+        elif reducer == 'median':
+            # значения внутри группы уже упорядочены: медиана - середина группы
+            lower = self._values[self._starts + (self.counts - 1) // 2]
+            upper = self._values[self._starts + self.counts // 2]
+            result = (lower + upper) / 2
+        else:
+            raise ValueError(f"Неизвестная функция агрегации: {reducer}. Допустимые: {', '.join(REDUCERS)}")
+        if self._integral and reducer in ('sum', 'min', 'max'):
+            result = result.astype(np.int64)
+        self._results[reducer] = result
+        return result
+
+    def frame(self, reducer):
+        """
+        :return: DataFrame со столбцами группировки и столбцом Y, содержащим сводку.
+        """
+        result = dict(self.keys)
+        result[self.y_column] = self.reduce(reducer)
+        return pds.DataFrame(result)
+
+
+class Aggregator:
+    """
+    Агрегация данных перед построением графика с запоминанием группировок.
+    Группировка (GroupedValues) хранится по ключу данных и столбцам, поэтому при смене
+    только функции агрегации данные повторно не сортируются.
+    """
+
+    def __init__(self, max_size=AGGREGATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._groups = OrderedDict()
+
+    def aggregate(self, data, x_column, y_column, reducer, series_column=None, key=None):
+        """
+        :param data: DataFrame с числовым столбцом Y (например, результат project).
+        :param x_column: Столбец группировки.
+        :param y_column: Столбец значений.
+        :param reducer: Одна из REDUCERS или NO_AGGREGATION.
+        :param series_column: Дополнительный столбец группировки или None.
+        :param key: Описание данных (например, значение фильтра); None - не запоминать группировку.
+        :return: DataFrame: по строке на группу (или data без изменений для NO_AGGREGATION)
+        """
+        if reducer in (None, NO_AGGREGATION):
+            return data
+        if key is None:
+            return GroupedValues(data, x_column, y_column, series_column).frame(reducer)
+
+        cache_key = (key, x_column, y_column, series_column)
+        groups = self._groups.get(cache_key)
+        if groups is None:
+            groups = GroupedValues(data, x_column, y_column, series_column)
+            self._groups[cache_key] = groups
+            while len(self._groups) > self.max_size:
+                self._groups.popitem(last=False)
+        else:
+            self._groups.move_to_end(cache_key)
+        return groups.frame(reducer)
+
+    def clear(self):
+        self._groups.clear()
@@ -0,0 +1,243 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from source.data_processing import load_data, process_all_data, ColumnIndex, NumericColumns, project, \
+    can_pivot, pivot_wide_cached
+from source import registry
+from source.aggregation import GroupedValues, REDUCERS, NO_AGGREGATION
+from source.binning import BIN_METHODS
+
+FIGURE_FORMATS = ('png', 'svg', 'pdf')  # форматы графиков Matplotlib и Seaborn
+PLOTLY_FORMATS = ('html', 'png', 'svg', 'pdf')  # png/svg/pdf для Plotly требуют пакет kaleido
+DEFAULT_FORMATS = {'matplotlib': 'png', 'seaborn': 'png', 'plotly': 'html'}
+PLOTLY_JS_FILE = 'plotly.min.js'  # один файл plotly.js в каталоге вывода для всех HTML графиков
+
+# Данные процесса-исполнителя: загружаются один раз при запуске процесса (см. _init_worker)
+_worker = {}
+
+
+def read_specs(spec_path):
+    """
+    Читает список графиков для выгрузки из JSON файла.
+
+    Файл содержит список объектов с ключами:
+    library, plot_type - библиотека и тип графика, как в интерфейсе (например "matplotlib", "Bar Chart");
+    x, y, z - столбцы осей (z только для контурных графиков); можно указывать показатели
+              из столбца variable - тогда график строится по широкой таблице (см. pivot_wide);
+    filter - значение X, по которому фильтруются данные (необязательно, по умолчанию все строки);
+    aggregate, series - функция агрегации Y по X (sum, mean, median, count, min, max) и
+                        дополнительный столбец группировки для столбчатых и линейных графиков (необязательно);
+    bins - способ разбиения на интервалы для гистограмм: fixed, fd или quantile (необязательно);
+    format - формат файла: png, svg, pdf или html (необязательно);
+    name - имя файла без расширения (необязательно).
+
+    :param spec_path: Путь к JSON файлу.
+    :return: список словарей
+    """
+    with open(spec_path, encoding='utf-8') as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError("Файл описания графиков должен содержать список")
+    for number, spec in enumerate(specs):
+        for key in ('library', 'plot_type'):
+            if key not in spec:
+                raise ValueError(f"В описании графика №{number + 1} нет ключа {key}")
+        chart = registry.get_chart(spec['library'], spec['plot_type'])
+        missing = [axis for axis in chart.columns if not spec.get(axis)]
+        if missing:
+            raise ValueError(f"В описании графика №{number + 1} не заданы столбцы: {', '.join(missing)}")
+        if spec.get('aggregate', NO_AGGREGATION) not in (NO_AGGREGATION, *REDUCERS):
+            raise ValueError(f"В описании графика №{number + 1} неизвестная агрегация {spec['aggregate']}. "
+                             f"Допустимые: {', '.join(REDUCERS)}")
+        if spec.get('bins', 'fixed') not in BIN_METHODS:
+            raise ValueError(f"В описании графика №{number + 1} неизвестный способ разбиения {spec['bins']}. "
+                             f"Допустимые: {', '.join(BIN_METHODS)}")
+    return specs
+
+
+def output_path(spec, number, output_dir):
+    """
+    :return: путь к файлу графика в каталоге вывода.
+    """
+    fmt = spec.get('format') or DEFAULT_FORMATS[spec['library']]
+    name = spec.get('name')
+    if not name:
+        parts = [f"{number:03d}", spec['library'], spec['plot_type'], spec.get('x'), spec.get('y'), spec.get('z'),
+                 spec.get('filter'), spec.get('aggregate'), spec.get('series'), spec.get('bins')]
+        name = '_'.join(str(part) for part in parts if part not in (None, ''))
+    name = re.sub(r'[^\w.-]+', '_', name)  # убираем символы, недопустимые в именах файлов
+    return os.path.join(output_dir, f"{name}.{fmt}")
+
+
+def _init_worker(data):
+    # Выполняется один раз в каждом процессе: графики рисуются без окон (Agg),
+    # данные, индекс значений и кэш числовых столбцов используются всеми задачами процесса
+    import matplotlib
+    matplotlib.use('Agg')
+    _worker['data'] = data
+    _worker['column_index'] = ColumnIndex(data)
+    _worker['numeric_columns'] = NumericColumns(data)
+    _worker['wide'] = None  # широкая таблица строится при первом графике по показателям
+
+
+def _worker_table(spec):
+    # Данные процесса-исполнителя для графика: исходные или широкая таблица показателей
+    data = _worker['data']
+    columns = [spec.get(axis) for axis in ('x', 'y', 'z', 'series') if spec.get(axis)]
+    if all(column in data.columns for column in columns) or not can_pivot(data):
+        return data, _worker['column_index'], _worker['numeric_columns']
+    if _worker['wide'] is None:
+        wide = pivot_wide_cached(data)
+        _worker['wide'] = wide, ColumnIndex(wide), NumericColumns(wide)
+    return _worker['wide']
+
+
+def chart_data(data, chart, spec, column_index=None, numeric_cache=None):
+    """
+    Выбирает данные для графика так же, как окно приложения при нажатии Plot Data.
+
+    :param data: Загруженный DataFrame.
+    :param chart: ChartSpec из реестра.
+    :param spec: Описание графика (см. read_specs).
+    :return: DataFrame с нужными столбцами
+    """
+    x_column, y_column, z_column = spec.get('x'), spec.get('y'), spec.get('z')
+    aggregate = (spec.get('aggregate') or NO_AGGREGATION) if chart.aggregatable else NO_AGGREGATION
+    series_column = spec.get('series') if aggregate != NO_AGGREGATION else None
+    used_columns = list(dict.fromkeys(spec[axis] for axis in chart.columns if spec.get(axis)))
+    if x_column and x_column not in used_columns:
+        used_columns.insert(0, x_column)
+    if series_column and series_column not in used_columns:
+        used_columns.append(series_column)
+
+    if not chart.filtered:
+        return process_all_data(project(data, used_columns), numeric_cache=numeric_cache)
+
+    positions = None
+    if spec.get('filter') not in (None, ''):
+        if not x_column:
+            raise ValueError("Для фильтрации нужно указать столбец x")
+        column_index = column_index if column_index is not None else ColumnIndex(data)
+        positions = column_index.positions(x_column, str(spec['filter']))
+    # Для гистограммы Y не приводится к целым (как в сводках столбцов, см. binning.finite_values)
+    selected = project(data, used_columns, numeric_columns=[] if chart.binned else [y_column], positions=positions,
+                       numeric_cache=numeric_cache)
+    if aggregate != NO_AGGREGATION and not selected.empty:
+        selected = GroupedValues(selected, x_column, y_column, series_column).frame(aggregate)
+    return selected
+
+
+def render_chart(spec, path, data=None):
+    """
+    Строит один график без окон и сохраняет его в файл.
+
+    :param spec: Описание графика (см. read_specs).
+    :param path: Путь к файлу; формат определяется по расширению.
+    :param data: DataFrame (None - данные процесса-исполнителя).
+    :return: время построения в секундах
+    """
+    from source import visualizations_max
+
+    start = time.perf_counter()
+    if data is None:
+        data, column_index, numeric_cache = _worker_table(spec)
+    else:
+        column_index, numeric_cache = None, None
+        columns = [spec.get(axis) for axis in ('x', 'y', 'z', 'series') if spec.get(axis)]
+        if not all(column in data.columns for column in columns) and can_pivot(data):
+            data = pivot_wide_cached(data)
+
+    chart = registry.get_chart(spec['library'], spec['plot_type'])
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    selected = chart_data(data, chart, spec, column_index, numeric_cache)
+    if selected.empty:
+        raise ValueError("Нет данных для выбранных фильтров")
+    columns = {axis: spec.get(axis) for axis in ('x', 'y', 'z')}
+    options = {'method': spec.get('bins') or 'fixed'} if chart.binned else {}
+    if chart.aggregatable and (spec.get('aggregate') or NO_AGGREGATION) != NO_AGGREGATION and spec.get('series'):
+        options['series_column'] = spec['series']
+
+    if chart.uses_figure:
+        if fmt not in FIGURE_FORMATS:
+            raise ValueError(f"Формат {fmt} не поддерживается для {chart.library}. Допустимые: {', '.join(FIGURE_FORMATS)}")
+        from matplotlib.figure import Figure
+
+        # Фигура без pyplot: не создает окон и освобождается после сохранения
+        figure = Figure(figsize=(12, 8))
+        visualizations_max.set_target_figure(figure)
+        try:
+            chart(selected, columns, **options)
+            figure.savefig(path, format=fmt)
+        finally:
+            visualizations_max.set_target_figure(None)
+    else:
+        if fmt not in PLOTLY_FORMATS:
+            raise ValueError(f"Формат {fmt} не поддерживается для {chart.library}. Допустимые: {', '.join(PLOTLY_FORMATS)}")
+        figures = []
+        visualizations_max.set_plotly_renderer(figures.append)  # фигура перехватывается вместо fig.show()
+        try:
+            chart(selected, columns, **options)
+        finally:
+            visualizations_max.set_plotly_renderer(None)
+        if fmt == 'html':
+            # plotly.js не встраивается в каждый файл, а подключается из общего файла в каталоге вывода
+            figures[0].write_html(path, include_plotlyjs=PLOTLY_JS_FILE, full_html=True)
+        else:
+            figures[0].write_image(path, format=fmt)  # требует пакет kaleido
+    return time.perf_counter() - start
+
+
+def _render_task(spec, path):
+    # Задача процесса-исполнителя; ошибка возвращается текстом, чтобы не прерывать остальные графики
+    try:
+        return path, render_chart(spec, path), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def write_plotly_js(output_dir):
+    """
+    Записывает plotly.min.js в каталог вывода один раз для всех HTML графиков.
+    """
+    target = os.path.join(output_dir, PLOTLY_JS_FILE)
+    if not os.path.exists(target):
+        from plotly.offline import get_plotlyjs
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return target
+
+
+def export_charts(file_path, specs, output_dir, workers=None):
+    """
+    Выгружает графики в файлы. Файл с данными читается один раз, после чего данные
+    передаются процессам-исполнителям, которые строят графики параллельно.
+
+    :param file_path: Путь к файлу с данными (xlsx или csv).
+    :param specs: Список описаний графиков (см. read_specs).
+    :param output_dir: Каталог для файлов графиков.
+    :param workers: Число процессов (None - по числу ядер, 1 - без пула процессов).
+    :return: список (путь, время построения или None, ошибка или None)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    data = load_data(file_path)
+    if data is None:
+        raise ValueError(f"Не удалось загрузить данные из файла {file_path}")
+
+    tasks = [(spec, output_path(spec, number, output_dir)) for number, spec in enumerate(specs, start=1)]
+    if any(path.endswith('.html') for _, path in tasks):
+        write_plotly_js(output_dir)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        _init_worker(data)
+        return [_render_task(spec, path) for spec, path in tasks]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                             initargs=(data,)) as pool:
+        futures = [pool.submit(_render_task, spec, path) for spec, path in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
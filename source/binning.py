@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pds
+
+BIN_METHODS = ('fixed', 'fd', 'quantile')  # равные интервалы, правило Фридмана-Диакониса, квантили
+DEFAULT_BINS = 10
+MAX_BINS = 1000  # правило Фридмана-Диакониса на больших данных дает слишком много узких интервалов
+HISTOGRAM_CACHE_SIZE = 32  # сколько гистограмм хранится для повторного использования
+
+
+class Histogram:
+    """
+    Готовая гистограмма: границы интервалов и число значений в каждом из них.
+    Функции построения рисуют только эти столбцы и не обращаются к исходным строкам.
+    """
+
+    def __init__(self, edges, counts):
+        """
+        :param edges: Границы интервалов (на одну больше, чем интервалов).
+        :param counts: Число значений в каждом интервале.
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+    def labels(self, precision=2):
+        """
+        :return: подписи интервалов вида 'левая - правая'.
+        """
+        return [f'{left:.{precision}f} - {right:.{precision}f}' for left, right in zip(self.edges[:-1], self.edges[1:])]
+
+
+def finite_values(values):
+    """
+    :param values: Series или массив; нечисловые значения считаются пропусками.
+    :return: массив float без пропусков и бесконечностей
+    """
+    if isinstance(values, pds.Series) and not pds.api.types.is_numeric_dtype(values):
+        values = pds.to_numeric(values, errors='coerce')
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    return values if finite.all() else values[finite]
+
+
+def bin_edges(values, bins=DEFAULT_BINS, method='fixed'):
+    """
+    Вычисляет границы интервалов гистограммы.
+
+    :param values: Массив float без пропусков (см. finite_values).
+    :param bins: Число интервалов для 'fixed' и 'quantile' (для 'fd' не используется).
+    :param method: Одна из BIN_METHODS.
+    :return: массив границ по возрастанию
+    """
+    if method not in BIN_METHODS:
+        raise ValueError(f"Неизвестный способ разбиения: {method}. Допустимые: {', '.join(BIN_METHODS)}")
+    if bins < 1:
+        raise ValueError("Число интервалов должно быть положительным")
+    if not len(values):
+        return np.linspace(0, 1, bins + 1)
+
+    low, high = values.min(), values.max()
+    if low == high:
+        # все значения одинаковые: интервалы вокруг значения, как в np.histogram
+        low, high = low - 0.5, high + 0.5
+
+    if method == 'quantile':
+        # интервалы с примерно равным числом значений; совпадающие квантили объединяются
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))
+        if len(edges) > 1:
+            return edges
+    elif method == 'fd':
+        # ширина интервала 2 * IQR / n^(1/3); при нулевом IQR - равные интервалы
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        width = 2 * (q3 - q1) / len(values) ** (1 / 3)
+        if width > 0:
+            bins = int(min(max(np.ceil((high - low) / width), 1), MAX_BINS))
+    return np.linspace(low, high, bins + 1)
+
+
+def bin_counts(values, edges):
+    """
+    Считает значения в интервалах за один проход: номер интервала каждого значения и np.bincount.
+    Значения вне [edges[0], edges[-1]] не учитываются; правая граница последнего интервала включается.
+
+    :param values: Массив float без пропусков.
+    :param edges: Границы интервалов по возрастанию.
+    :return: массив int64 длины len(edges) - 1
+    """
+    n = len(edges) - 1
+    if len(values) and (values.min() < edges[0] or values.max() > edges[-1]):
+        values = values[(values >= edges[0]) & (values <= edges[-1])]
+    widths = np.diff(edges)
+    if np.allclose(widths, widths[0]):
+        # равные интервалы: номер вычисляется арифметически, без поиска по границам
+        index = ((values - edges[0]) * (n / (edges[-1] - edges[0]))).astype(np.intp)
+        np.minimum(index, n - 1, out=index)
+        # поправка на ошибки округления у самых границ, как в np.histogram
+        index[values < edges[index]] -= 1
+        index[(values >= edges[index + 1]) & (index != n - 1)] += 1
+    else:
+        index = np.searchsorted(edges, values, side='right') - 1
+        np.minimum(index, n - 1, out=index)
+    return np.bincount(index, minlength=n)
+
+
+def compute_histogram(values, bins=DEFAULT_BINS, method='fixed'):
+    """
+    :param values: Series или массив значений.
+    :return: Histogram
+    """
+    values = finite_values(values)
+    edges = bin_edges(values, bins, method)
+    return Histogram(edges, bin_counts(values, edges))
+
+
+class HistogramCache:
+    """
+    Гистограммы выбранных данных с вытеснением давно не использованных (LRU).
+    Ключ - описание данных (таблица, столбец фильтра и его значение), столбец, число интервалов и способ разбиения,
+    поэтому повторное построение того же столбца любой библиотекой не проходит по строкам заново.
+    """
+
+    def __init__(self, max_size=HISTOGRAM_CACHE_SIZE):
+        self.max_size = max_size
+        self._histograms = OrderedDict()
+
+    def histogram(self, data, column, bins=DEFAULT_BINS, method='fixed', key=None):
+        """
+        :param data: DataFrame со столбцом column.
+        :param column: Столбец значений.
+        :param bins: Число интервалов.
+        :param method: Одна из BIN_METHODS.
+        :param key: Описание выборки (например, таблица, столбец X и значение фильтра); None - не запоминать гистограмму.
+        :return: Histogram
+        """
+        if key is None:
+            return compute_histogram(data[column], bins, method)
+
+        cache_key = (key, column, bins, method)
+        histogram = self._histograms.get(cache_key)
+        if histogram is None:
+            histogram = compute_histogram(data[column], bins, method)
+            self._histograms[cache_key] = histogram
+            while len(self._histograms) > self.max_size:
+                self._histograms.popitem(last=False)
+        else:
+            self._histograms.move_to_end(cache_key)
+        return histogram
+
+    def clear(self):
+        self._histograms.clear()
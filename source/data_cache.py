@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pds
+
+# Каталог кэша можно переопределить переменной окружения
+CACHE_DIR = os.environ.get('DIPLOM_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'diplom_data'))
+MAX_CACHE_BYTES = 2 * 1024 ** 3  # ограничение размера кэша по умолчанию (2 ГБ)
+CACHE_VERSION = 4  # меняется при изменении формата хранения
+
+_HASH_CHUNK = 1024 * 1024
+# Типы значений словаря, которые хранятся как текст + метка типа (без pickle)
+_UNIQUE_TYPES = {'str': str, 'int': int, 'float': float, 'bool': lambda text: text == 'True'}
+
+
+def file_fingerprint(file_path, progress=None):
+    """
+    Вычисляет отпечаток файла: путь, размер, время изменения и хэш содержимого.
+
+    :param file_path: Путь к файлу.
+    :param progress: Функция progress(done, total), вызываемая по мере хэширования (может прервать его исключением).
+    :return: словарь с полями path, size, mtime, content_hash.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    return {'path': path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'content_hash': content_hash(path, progress=progress)}
+
+
+def content_hash(file_path, size=None, progress=None):
+    """
+    :param file_path: Путь к файлу.
+    :param size: Сколько первых байт учитывать (None - весь файл).
+    :param progress: Функция progress(done, total), вызываемая после каждого блока.
+    :return: хэш содержимого (blake2b, 16 байт, в шестнадцатеричном виде)
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    total = os.path.getsize(file_path) if size is None else size
+    done = 0
+    with open(file_path, 'rb') as f:
+        while size is None or done < size:
+            chunk = f.read(_HASH_CHUNK if size is None else min(_HASH_CHUNK, size - done))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, total)
+    return hasher.hexdigest()
+
+
+def cache_key(fingerprint):
+    """
+    Строит ключ кэша по отпечатку файла.
+
+    :param fingerprint: Отпечаток из file_fingerprint.
+    :return: строка-ключ (имя каталога записи).
+    """
+    raw = f"{CACHE_VERSION}|{fingerprint['path']}|{fingerprint['size']}|" \
+          f"{fingerprint['mtime']}|{fingerprint['content_hash']}"
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _entry_dir(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, key)
+
+
+def _encode_uniques(uniques):
+    """
+    Представляет словарь уникальных значений массивами без объектов Python.
+
+    :param uniques: Массив уникальных значений.
+    :return: (массив строк, массив меток типа или None, если все значения - строки)
+    """
+    if all(isinstance(value, str) for value in uniques):
+        return np.asarray(uniques, dtype=str), None
+    tags = []
+    for value in uniques:
+        # bool проверяется раньше int: True - тоже целое число
+        if isinstance(value, (bool, np.bool_)):
+            tags.append('bool')
+        elif isinstance(value, str):
+            tags.append('str')
+        elif isinstance(value, (int, np.integer)):
+            tags.append('int')
+        elif isinstance(value, (float, np.floating)):
+            tags.append('float')
+        else:
+            raise ValueError(f"Значения типа {type(value).__name__} нельзя сохранить в кэш")
+    return np.array([str(value) for value in uniques], dtype=str), np.array(tags, dtype=str)
+
+
+def _decode_uniques(texts, tags=None):
+    """
+    Восстанавливает словарь уникальных значений, сохраненный _encode_uniques.
+    """
+    if tags is None:
+        return texts.astype(object)
+    values = np.empty(len(texts), dtype=object)
+    values[:] = [_UNIQUE_TYPES[tag](text) for text, tag in zip(texts.tolist(), tags.tolist())]
+    return values
+
+
+def _dir_size(path):
+    total = 0
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            total += os.path.getsize(full)
+    return total
+
+
+def store_cached(fingerprint, data, cache_dir=None, max_bytes=MAX_CACHE_BYTES, optimized=False):
+    """
+    Сохраняет DataFrame в кэш по столбцам в формате NumPy (.npz).
+    Строковые столбцы хранятся как целочисленные коды + словарь уникальных значений.
+
+    :param fingerprint: Отпечаток исходного файла.
+    :param data: DataFrame для сохранения.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :param max_bytes: Ограничение размера кэша после записи.
+    :param optimized: Сжаты ли типы столбцов (см. data_processing.optimize_dtypes).
+    """
+    arrays = {}
+    columns = []
+    for i, column in enumerate(data.columns):
+        series = data[column]
+        dtype = series.dtype
+        if isinstance(dtype, pds.CategoricalDtype):
+            kind = 'category'
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories.to_numpy()
+        elif pds.api.types.is_numeric_dtype(dtype) or pds.api.types.is_bool_dtype(dtype):
+            kind = 'numeric'
+        elif pds.api.types.is_datetime64_any_dtype(dtype):
+            kind = 'datetime'
+        else:
+            kind = 'factorized'
+            codes, uniques = pds.factorize(series, use_na_sentinel=True)
+
+        if kind == 'numeric':
+            arrays[f'c{i}'] = series.to_numpy()
+        elif kind == 'datetime':
+            arrays[f'c{i}'] = series.to_numpy().view('int64')
+        else:
+            arrays[f'c{i}_codes'] = codes.astype(np.int32)
+            # словарь храним без pickle: строки как есть, смешанные типы - текстом с меткой типа;
+            # другие объекты не сохраняются (ValueError), и файл при следующей загрузке разбирается заново
+            arrays[f'c{i}_uniques'], tags = _encode_uniques(np.asarray(uniques, dtype=object))
+            if tags is not None:
+                arrays[f'c{i}_types'] = tags
+        columns.append({'name': str(column), 'kind': kind, 'dtype': str(dtype)})
+
+    # устаревшие записи того же файла больше не понадобятся
+    invalidate(fingerprint['path'], cache_dir)
+
+    key = cache_key(fingerprint)
+    entry = _entry_dir(key, cache_dir)
+    tmp = entry + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    np.savez(os.path.join(tmp, 'data.npz'), **arrays)
+    meta = dict(fingerprint, columns=columns, rows=len(data), version=CACHE_VERSION,
+                optimized=optimized, created=time.time())
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(tmp, entry)
+    if max_bytes is not None:
+        enforce_size_limit(max_bytes, cache_dir)
+
+
+def load_cached(fingerprint, cache_dir=None, optimized=None):
+    """
+    Загружает DataFrame из кэша, если для отпечатка есть запись.
+
+    :param fingerprint: Отпечаток исходного файла.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :param optimized: Требуемое сжатие типов (True/False); None - любое.
+    :return: DataFrame или None, если записи нет, она повреждена или сохранена с другим сжатием типов.
+    """
+    entry = _entry_dir(cache_key(fingerprint), cache_dir)
+    meta_path = os.path.join(entry, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if optimized is not None and meta.get('optimized', False) != optimized:
+            return None
+        columns = {}
+        with np.load(os.path.join(entry, 'data.npz'), allow_pickle=False) as arrays:
+            for i, column in enumerate(meta['columns']):
+                kind = column['kind']
+                if kind == 'numeric':
+                    values = pds.Series(arrays[f'c{i}'], dtype=column['dtype'])
+                elif kind == 'datetime':
+                    values = pds.Series(arrays[f'c{i}'].view('datetime64[ns]')).astype(column['dtype'])
+                else:
+                    tags = arrays[f'c{i}_types'] if f'c{i}_types' in arrays.files else None
+                    values = pds.Series(pds.Categorical.from_codes(arrays[f'c{i}_codes'],
+                                                                   _decode_uniques(arrays[f'c{i}_uniques'], tags)))
+                    if kind != 'category':
+                        values = values.astype(column['dtype'])
+                columns[column['name']] = values
+    except Exception as e:
+        print(f"Ошибка при чтении кэша {entry}: {e}")
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    os.utime(meta_path)  # отметка последнего использования для LRU-очистки
+    return pds.DataFrame(columns)
+
+
+def find_prefix_entry(fingerprint, cache_dir=None, progress=None):
+    """
+    Ищет запись кэша для прежней версии того же файла, если файл изменился только дописыванием в конец
+    (например, в выгрузку добавили строки за новый год): содержимое прежней версии совпадает с началом файла.
+
+    :param fingerprint: Отпечаток текущего файла.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :param progress: Функция progress(done, total) для хэширования начала файла.
+    :return: метаданные записи (отпечаток прежней версии, columns, rows) или None
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return None
+    for key in os.listdir(cache_dir):
+        meta_path = os.path.join(cache_dir, key, 'meta.json')
+        if not os.path.exists(meta_path):
+            continue
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if meta.get('version') != CACHE_VERSION or meta['path'] != fingerprint['path'] \
+                or not 0 < meta['size'] < fingerprint['size']:
+            continue
+        if content_hash(fingerprint['path'], meta['size'], progress) == meta['content_hash']:
+            return meta
+    return None
+
+
+def store_summaries(fingerprint, arrays, cache_dir=None):
+    """
+    Сохраняет сводки столбцов (см. summaries.DatasetSummaries) рядом с данными записи кэша.
+
+    :param fingerprint: Отпечаток исходного файла.
+    :param arrays: Словарь массивов NumPy.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    """
+    entry = _entry_dir(cache_key(fingerprint), cache_dir)
+    if not os.path.isdir(entry):
+        return
+    tmp = os.path.join(entry, 'summaries.tmp.npz')
+    np.savez(tmp, **arrays)
+    os.replace(tmp, os.path.join(entry, 'summaries.npz'))
+
+
+def load_summaries(fingerprint, cache_dir=None):
+    """
+    :param fingerprint: Отпечаток исходного файла.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :return: словарь массивов сводок или None, если их нет.
+    """
+    path = os.path.join(_entry_dir(cache_key(fingerprint), cache_dir), 'summaries.npz')
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+    except Exception as e:
+        print(f"Ошибка при чтении сводок {path}: {e}")
+        return None
+
+
+def cache_info(cache_dir=None):
+    """
+    Возвращает сведения о записях кэша.
+
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :return: DataFrame с колонками key, path, rows, bytes, last_used.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    records = []
+    if os.path.isdir(cache_dir):
+        for key in os.listdir(cache_dir):
+            meta_path = os.path.join(cache_dir, key, 'meta.json')
+            if not os.path.exists(meta_path):
+                continue
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            records.append({'key': key,
+                            'path': meta['path'],
+                            'rows': meta['rows'],
+                            'bytes': _dir_size(os.path.join(cache_dir, key)),
+                            'last_used': os.path.getmtime(meta_path)})
+    return pds.DataFrame(records, columns=['key', 'path', 'rows', 'bytes', 'last_used'])
+
+
+def invalidate(file_path=None, cache_dir=None):
+    """
+    Удаляет записи кэша для файла или весь кэш.
+
+    :param file_path: Путь к исходному файлу; None - очистить весь кэш.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :return: количество удаленных записей.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    info = cache_info(cache_dir)
+    if file_path is not None:
+        info = info[info['path'] == os.path.abspath(file_path)]
+    for key in info['key']:
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+    return len(info)
+
+
+def enforce_size_limit(max_bytes=MAX_CACHE_BYTES, cache_dir=None):
+    """
+    Ограничивает размер кэша, удаляя давно неиспользуемые записи.
+
+    :param max_bytes: Допустимый суммарный размер кэша в байтах.
+    :param cache_dir: Каталог кэша (по умолчанию CACHE_DIR).
+    :return: количество удаленных записей.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    info = cache_info(cache_dir).sort_values('last_used')
+    total = info['bytes'].sum()
+    removed = 0
+    for key, size in zip(info['key'], info['bytes']):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
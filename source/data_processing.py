@@ -1,23 +1,292 @@
+import io
+import os
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pds
+from source import data_cache
+from source.summaries import DatasetSummaries, summary_columns
+
+CATEGORY_RATIO = 0.5  # доля уникальных значений, ниже которой строковый столбец становится category
+
+
+class _ProgressReader(io.RawIOBase):
+    """
+    Обертка над файлом, сообщающая о прочитанных байтах.
+    Функция progress(done, total) может прервать чтение, выбросив исключение.
+    """
+
+    def __init__(self, file_path, progress):
+        self._file = open(file_path, 'rb', buffering=0)
+        self._progress = progress
+        # для CSV байты читаются последовательно, для XLSX (zip-архив) - нет,
+        # поэтому общий объем не сообщается и прогресс неопределенный
+        self._total = os.path.getsize(file_path) if file_path.endswith('.csv') else 0
+        self._done = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        self._done += count or 0
+        self._progress(self._done, self._total)
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _report_stage(file_path, progress):
+    # сообщает о завершении очередного этапа загрузки: progress может прервать загрузку исключением
+    size = os.path.getsize(file_path) if file_path.endswith('.csv') else 0
+    progress(size, size)
+
+
+def load_data(file_path, use_cache=True, progress=None, optimize=True):
+    """
+    Загружает данные в CSV или Excel.
+    Повторная загрузка неизмененного файла выполняется из бинарного кэша (см. data_cache);
+    в кэше хранятся уже сжатые типы, поэтому optimize_dtypes при повторной загрузке не выполняется.
+    :param file_path: Путь к файлу
+    :param use_cache: Использовать ли кэш разобранных файлов
+    :param progress: Функция progress(done, total), вызываемая по мере чтения файла
+    :param optimize: Сжимать ли типы столбцов после загрузки (см. optimize_dtypes)
+    :return: DataFrame
+    """
+
+    if not file_path.endswith(('.csv', '.xlsx')):
+        raise ValueError("Неподдерживаемый формат файла. Пожалуйста загрузите CSV или XLSX файл")
+
+    data = None
+    cached = False
+    previous = None  # (число прежних строк, их сводки), если к файлу только дописали строки
+    if use_cache:
+        # хэширование большого файла занимает заметное время: о нем тоже сообщается, и его можно прервать
+        fingerprint = data_cache.file_fingerprint(file_path, progress)
+        data = data_cache.load_cached(fingerprint, optimized=optimize)
+        cached = data is not None
+        if data is None and file_path.endswith('.csv'):
+            data, previous = load_appended(file_path, fingerprint, optimize, progress)
+
+    if data is None:
+        data = parse_file(file_path, progress)
+        if progress is not None:
+            _report_stage(file_path, progress)  # перед сжатием типов загрузку еще можно отменить
+        if optimize:
+            # объем сэкономленной памяти сообщается только при разборе файла: из кэша данные читаются уже сжатыми
+            before = data.memory_usage(deep=True).sum()
+            data = optimize_dtypes(data)
+            after = data.memory_usage(deep=True).sum()
+            if before:
+                print(f"Оптимизация типов: {before / 1024 ** 2:.2f} МБ -> {after / 1024 ** 2:.2f} МБ "
+                      f"(экономия {100 * (1 - after / before):.0f}%)")
+            if progress is not None:
+                _report_stage(file_path, progress)
+    if use_cache and not cached:
+        try:
+            data_cache.store_cached(fingerprint, data, optimized=optimize)
+        except Exception as e:
+            print(f"Не удалось сохранить данные в кэш: {e}")
+
+    if use_cache:
+        # хэш содержимого файла идентифицирует данные для кэша готовых графиков (см. render_cache)
+        data.attrs['content_hash'] = fingerprint['content_hash']
+        data.attrs['fingerprint'] = fingerprint
+        if previous is not None and previous[1] is not None:
+            # сводки прежних строк дополняются только новыми строками
+            rows, summaries = previous
+            if set(summaries.columns) == set(summary_columns(data)):
+                summaries.append(data.iloc[rows:])
+                _remember_summaries(data, summaries)
+    return data
+
+
+def load_appended(file_path, fingerprint, optimize=True, progress=None):
+    """
+    Загружает CSV файл, к которому после предыдущей загрузки только дописали строки:
+    прежние строки берутся из кэша, разбираются только новые.
+
+    :param file_path: Путь к файлу.
+    :param fingerprint: Отпечаток текущего файла.
+    :param optimize: Сжаты ли типы столбцов (как в load_data).
+    :param progress: Функция progress(done, total) (как в load_data).
+    :return: (DataFrame или None, (число прежних строк, сводки прежних строк или None) или None)
+    """
+    meta = data_cache.find_prefix_entry(fingerprint, progress=progress)
+    if meta is None or meta.get('optimized', False) != optimize:
+        return None, None
+    tail = parse_appended(file_path, meta['size'], meta['columns'])
+    if tail is None:
+        return None, None
+    previous = {key: meta[key] for key in ('path', 'size', 'mtime', 'content_hash')}
+    head = data_cache.load_cached(previous, optimized=optimize)
+    if head is None:
+        return None, None
+    data = append_rows(head, tail) if optimize else pds.concat([head, tail], ignore_index=True)
+    if data is None:
+        return None, None
+    # сводки читаются до сохранения новой версии: store_cached удаляет записи прежней версии
+    arrays = data_cache.load_summaries(previous)
+    summaries = DatasetSummaries.from_arrays(arrays) if arrays is not None else None
+    print(f"К файлу дописано строк: {len(tail)}")
+    return data, (len(head), summaries)
+
+
+def append_rows(head, tail):
+    """
+    Дописывает к данным со сжатыми типами (см. optimize_dtypes) только что разобранные строки,
+    приводя их к типам прежних строк: категории объединяются, числа сжимаются заново.
+
+    :param head: DataFrame после optimize_dtypes.
+    :param tail: Новые строки, как их прочитал parse_appended.
+    :return: DataFrame или None, если новые строки не подходят к типам прежних
+    """
+
+    columns = {}
+    for column in head.columns:
+        old, new = head[column], tail[column]
+        if isinstance(old.dtype, pds.CategoricalDtype):
+            merged = pds.api.types.union_categoricals([old.cat.as_unordered(), new.astype('category')],
+                                                      sort_categories=True, ignore_order=True)
+            merged = pds.Series(merged)
+        elif pds.api.types.is_bool_dtype(old.dtype) or pds.api.types.is_datetime64_any_dtype(old.dtype):
+            if new.dtype != old.dtype:
+                return None
+            merged = pds.concat([old, new], ignore_index=True)
+        elif pds.api.types.is_numeric_dtype(old.dtype):
+            numbers = pds.to_numeric(new, errors='coerce')
+            # в числовом столбце появились не числа - при полном разборе он остался бы текстовым
+            if (numbers.isna() & new.notna()).any():
+                return None
+            merged = _downcast_numeric(pds.concat([old.astype(float), numbers.astype(float)], ignore_index=True))
+        else:
+            merged = pds.concat([old, new.astype(old.dtype)], ignore_index=True)
+        columns[column] = merged
+    return pds.DataFrame(columns)
+
+
+def parse_appended(file_path, offset, columns):
+    """
+    Разбирает строки CSV файла, дописанные после первых offset байт.
+    Текстовые столбцы читаются как строки, чтобы типы совпали с прежними строками.
+
+    :param file_path: Путь к файлу.
+    :param offset: Размер прежней версии файла в байтах.
+    :param columns: Описание столбцов прежней версии (meta['columns'] записи кэша).
+    :return: DataFrame новых строк или None, если их нельзя разобрать так же, как весь файл
+    """
+    names = [column['name'] for column in columns]
+    text = {column['name']: str for column in columns if column['kind'] in ('factorized', 'category')}
+    with open(file_path, 'rb') as f:
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            return None  # прежняя версия обрывалась посреди строки
+        try:
+            tail = pds.read_csv(f, header=None, names=names, dtype=text)
+        except pds.errors.EmptyDataError:
+            return None
+    for column in columns:
+        # в числовом столбце появились не числа или даты - весь файл разбирается заново
+        if column['kind'] == 'datetime' or \
+                (column['kind'] == 'numeric' and not pds.api.types.is_numeric_dtype(tail[column['name']])):
+            return None
+    return tail
 
 
-def load_data(file_path):
+def parse_file(file_path, progress=None):
     """
-    Загружает данные в CSV или Excel
+    Разбирает CSV или Excel файл без использования кэша
     :param file_path: Путь к файлу
+    :param progress: Функция progress(done, total), вызываемая по мере чтения файла
     :return: DataFrame
     """
 
     if file_path.endswith('.csv'):
-        data = pds.read_csv(file_path)
+        reader = pds.read_csv
     elif file_path.endswith('.xlsx'):
-        data = pds.read_excel(file_path)
+        reader = pds.read_excel
     else:
         raise ValueError("Неподдерживаемый формат файла. Пожалуйста загрузите CSV или XLSX файл")
 
+    if progress is None:
+        return reader(file_path)
+
+    with io.BufferedReader(_ProgressReader(file_path, progress)) as source:
+        data = reader(source)
     return data
 
 
+def _downcast_numeric(series):
+    """
+    Приводит числовой столбец к наименьшему типу без потери значений
+    :param series: числовой Series
+    :return: Series
+    """
+
+    if pds.api.types.is_bool_dtype(series):
+        return series
+    if pds.api.types.is_integer_dtype(series):
+        return pds.to_numeric(series, downcast='integer')
+
+    values = series.to_numpy(dtype=float)
+    finite = values[~np.isnan(values)]
+    # вещественные столбцы без пропусков с целыми значениями храним как целые,
+    # если значения помещаются в int64 (иначе приведение молча испортит данные)
+    limits = np.iinfo(np.int64)
+    if len(finite) == len(values) and np.array_equal(finite, np.round(finite)) \
+            and (not len(finite) or (finite.min() >= limits.min and finite.max() <= limits.max)):
+        return pds.to_numeric(series.astype(np.int64), downcast='integer')
+    # float32 используем, только если все значения в нем представимы точно
+    if np.array_equal(finite.astype(np.float32).astype(float), finite):
+        return series.astype(np.float32)
+    return series
+
+
+def optimize_dtypes(data, category_ratio=CATEGORY_RATIO):
+    """
+    Сжимает типы столбцов: числа - к наименьшему целому/вещественному типу,
+    строковые столбцы, все значения которых - числа, - к числам,
+    остальные строковые столбцы с малым числом уникальных значений - к category.
+    Столбцы с нечисловыми метками (например 'C') остаются текстовыми, чтобы метки не терялись.
+    :param data: DataFrame
+    :param category_ratio: Максимальная доля уникальных значений для category
+    :return: DataFrame с оптимизированными типами
+    """
+
+    columns = {}
+    for column in data.columns:
+        series = data[column]
+        if pds.api.types.is_numeric_dtype(series):
+            series = _downcast_numeric(series)
+        elif pds.api.types.is_object_dtype(series) or pds.api.types.is_string_dtype(series):
+            present = series.dropna()
+            # проверяем на небольшой выборке, похож ли столбец на числовой
+            sample = pds.to_numeric(present.head(1000), errors='coerce')
+            numeric = None
+            if len(present) and sample.notna().all():
+                numeric = pds.to_numeric(series, errors='coerce')
+                if (numeric.isna() & series.notna()).any():
+                    numeric = None
+            if numeric is not None:
+                series = _downcast_numeric(numeric)
+            elif series.nunique() <= category_ratio * len(series):
+                series = series.astype('category')
+        columns[column] = series
+
+    return pds.DataFrame(columns, index=data.index)
+
+
 def process_data(data, column):
     """
     Обрабатывает загруженные данные
@@ -27,24 +296,420 @@ def process_data(data, column):
 
     # преобразование в числа, ошибки - в NaN и заменяем на 0.
     try:
-        data.loc[:, column] = pds.to_numeric(data[column], errors='coerce').fillna(0).astype(int)
+        # столбец заменяется целиком: присваивание через loc не меняет тип category
+        data[column] = pds.to_numeric(data[column], errors='coerce').fillna(0).astype(int)
         # data.loc[:, column] = data[column].fillna(0).astype(int)
     except Exception as e:
         print(f"Ошибка при обработке столбца {column}: {e}")
     return data
 
 
-def process_all_data(data):
+def process_all_data(data, columns=None, numeric_cache=None):
     """
-    Обрабатывает загруженные данные
+    Обрабатывает загруженные данные: преобразует столбцы в числа (ошибки преобразования - 0)
     :param data: DataFrame
-    :return: обработанный DataFrame
+    :param columns: Столбцы для преобразования (None - все столбцы)
+    :param numeric_cache: NumericColumns загруженных данных, чтобы не преобразовывать столбцы повторно
+    :return: новый DataFrame, исходный не изменяется
     """
 
-    # преобразование в числа, ошибки - в NaN и заменяем на 0.
+    processed = data.copy(deep=False)
+    # кэш подходит, только если он построен по тем же строкам
+    if numeric_cache is not None and not numeric_cache.data.index.equals(data.index):
+        numeric_cache = None
+    for column in (data.columns if columns is None else dict.fromkeys(columns)):
+        try:
+            if numeric_cache is not None:
+                processed[column] = numeric_cache.get(column, integer=False)
+            else:
+                processed[column] = coerce_numeric(data[column], integer=False)
+        except Exception as e:
+            print(f"Ошибка при обработке столбца {column}: {e}")
+    return processed
+
+CHUNK_SIZE = 100_000  # число строк в одном блоке при потоковом чтении CSV
+
+
+def read_columns(file_path):
+    """
+    Читает только заголовок CSV файла
+    :param file_path: Путь к файлу
+    :return: список названий столбцов
+    """
+
+    return list(pds.read_csv(file_path, nrows=0).columns)
+
+
+def stream_unique_values(file_path, column, chunksize=CHUNK_SIZE):
+    """
+    Собирает уникальные значения столбца, читая CSV по блокам
+    :param file_path: Путь к файлу
+    :param column: Название столбца
+    :param chunksize: Число строк в блоке
+    :return: множество уникальных значений в строковом виде (как в выпадающем списке)
+    """
+
+    unique_values = set()
+    for chunk in pds.read_csv(file_path, usecols=[column], chunksize=chunksize):
+        # тип столбца определяется в каждом блоке заново (2013 или 2013.0 при пропусках),
+        # поэтому значения сравниваются в едином строковом виде (см. value_labels)
+        unique_values.update(value_labels(chunk[column].dropna()).unique())
+    return unique_values
+
+
+def load_data_streaming(file_path, columns=None, numeric_columns=(), x_column=None, x_filter_value=None,
+                        chunksize=CHUNK_SIZE):
+    """
+    Загружает CSV по блокам, сохраняя только отфильтрованный результат.
+    Пиковое потребление памяти определяется размером блока, а не размером файла.
+    :param file_path: Путь к файлу
+    :param columns: Список нужных столбцов (None - все столбцы)
+    :param numeric_columns: Столбцы, которые преобразуются в числа как в process_data
+    :param x_column: Столбец для фильтрации
+    :param x_filter_value: Значение фильтра (сравнивается в строковом виде, как в выпадающем списке)
+    :param chunksize: Число строк в блоке
+    :return: DataFrame
+    """
+
+    if not file_path.endswith('.csv'):
+        raise ValueError("Потоковая загрузка поддерживается только для CSV файлов")
+
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + ([x_column] if x_column else [])))
+
+    parts = []
+    for chunk in pds.read_csv(file_path, usecols=usecols, chunksize=chunksize):
+        if x_column and x_filter_value is not None:
+            chunk = chunk[value_labels(chunk[x_column]) == str(x_filter_value)]
+            if chunk.empty:
+                continue
+        for column in numeric_columns:
+            # преобразование в числа, ошибки - в NaN и заменяем на 0.
+            chunk = chunk.assign(**{column: pds.to_numeric(chunk[column], errors='coerce').fillna(0).astype(int)})
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        parts.append(chunk)
+
+    if not parts:
+        return pds.DataFrame(columns=read_columns(file_path) if columns is None else list(columns))
+    return pds.concat(parts, ignore_index=True)
+
+
+def value_label(value):
+    """
+    Строковый вид значения в списке фильтра: целые вещественные числа - без '.0' (2013, а не 2013.0),
+    чтобы значение выглядело так же, как в файле.
+    """
+    if isinstance(value, (float, np.floating)) and np.isfinite(value) and value == int(value):
+        return str(int(value))
+    return str(value)
+
+
+def value_labels(series):
+    """
+    Строковый вид значений столбца, как у value_label, без перебора значений в Python.
+    :param series: Series
+    :return: Series строк
+    """
+    if not pds.api.types.is_float_dtype(series):
+        return series.astype(str)
+    values = series.to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        integral = np.isfinite(values) & (values == np.round(values)) & (np.abs(values) < 2 ** 63)
+    labels = series.astype(str).to_numpy(dtype=object)
+    labels[integral] = values[integral].astype(np.int64).astype(str)
+    return pds.Series(labels, index=series.index, name=series.name)
+
+
+class ColumnIndex:
+    """
+    Ленивый индекс "значение столбца -> номера строк" для загруженного DataFrame.
+    Индекс столбца строится один раз при первом обращении и переиспользуется
+    при последующих фильтрациях; для новых данных создается новый объект.
+    Значения сравниваются в строковом виде, как они показаны в выпадающем списке.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._indexes = {}
+
+    def _build(self, column):
+        codes, uniques = pds.factorize(self.data[column])
+        # значения, совпадающие в строковом виде (например 1 и '1'), объединяем
+        labels, label_uniques = pds.factorize(np.array([value_label(value) for value in uniques], dtype=object))
+        if len(labels):
+            codes = np.where(codes >= 0, labels[np.maximum(codes, 0)], -1)
+
+        # строки, отсортированные по коду значения, и границы групп
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=len(label_uniques))
+        bounds = np.concatenate(([0], np.cumsum(counts))) + np.count_nonzero(codes < 0)
+        index = {label: (order, bounds[i], bounds[i + 1]) for i, label in enumerate(label_uniques)}
+        self._indexes[column] = index
+        return index
+
+    def _get(self, column):
+        index = self._indexes.get(column)
+        return index if index is not None else self._build(column)
+
+    def values(self, column):
+        """
+        :param column: Название столбца
+        :return: список уникальных значений столбца (в строковом виде, без пропусков)
+        """
+        return list(self._get(column))
+
+    def positions(self, column, value):
+        """
+        :param column: Название столбца
+        :param value: Значение фильтра
+        :return: массив номеров строк, в которых столбец равен value
+        """
+        entry = self._get(column).get(str(value))
+        if entry is None:
+            return np.empty(0, dtype=np.intp)
+        order, start, stop = entry
+        return order[start:stop]
+
+    def filter(self, column, value):
+        """
+        :param column: Название столбца
+        :param value: Значение фильтра
+        :return: строки DataFrame, в которых столбец равен value
+        """
+        return self.data.iloc[self.positions(column, value)]
+
+
+def _to_numbers(series):
+    # Числовой Series с NaN на месте пропусков и значений, которые не являются числами
+    if pds.api.types.is_numeric_dtype(series.dtype):
+        return series
+    if isinstance(series.dtype, pds.CategoricalDtype):
+        # каждая категория преобразуется один раз, строки получают значения по кодам
+        categories = pds.to_numeric(pds.Series(series.cat.categories), errors='coerce').to_numpy(dtype=float)
+        codes = series.cat.codes.to_numpy()
+        values = np.where(codes >= 0, categories[codes], np.nan) if len(categories) else np.full(len(codes), np.nan)
+        return pds.Series(values, index=series.index, name=series.name)
+    return pds.to_numeric(series, errors='coerce')
+
+
+def coerce_numeric(series, integer=True):
+    """
+    Преобразует столбец в числа; ошибки преобразования и пропуски заменяются на 0.
+    Уже числовые столбцы не разбираются повторно, у категориальных разбираются только категории
+    :param series: Series
+    :param integer: Приводить ли к целым числам, как process_data
+    :return: числовой Series
+    """
+
+    numbers = _to_numbers(series)
+    if integer:
+        return numbers.fillna(0).astype(int)
+    return numbers.fillna(0) if numbers.hasnans else numbers
+
+
+class NumericColumns:
+    """
+    Кэш столбцов загруженного DataFrame, преобразованных в числа (см. coerce_numeric).
+    Каждый столбец преобразуется один раз (отдельно в целые и в любые числа); массивы доступны только для чтения,
+    чтобы построители графиков не могли изменить кэшированные значения.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._columns = {}
+
+    def get(self, column, integer=True):
+        """
+        :param column: Название столбца
+        :param integer: Целые числа, как в process_data (False - как в process_all_data)
+        :return: числовой Series
+        """
+        series = self._columns.get((column, integer))
+        if series is None:
+            # view: запрет записи не распространяется на массив исходных данных, если столбец уже числовой
+            values = coerce_numeric(self.data[column], integer).to_numpy().view()
+            values.flags.writeable = False
+            series = pds.Series(values, index=self.data.index, name=column, copy=False)
+            self._columns[(column, integer)] = series
+        return series
+
+
+def project(data, columns, numeric_columns=(), positions=None, numeric_cache=None):
+    """
+    Выбирает из DataFrame только нужные столбцы (и строки), не копируя весь набор данных.
+    :param data: DataFrame
+    :param columns: Список нужных столбцов
+    :param numeric_columns: Столбцы, которые нужно получить в числовом виде
+    :param positions: Номера строк (None - все строки)
+    :param numeric_cache: NumericColumns для повторного использования преобразованных столбцов
+    :return: новый DataFrame из выбранных столбцов
+    """
+
+    selected = {}
+    for column in dict.fromkeys(columns):
+        if column in numeric_columns:
+            series = numeric_cache.get(column) if numeric_cache is not None else coerce_numeric(data[column])
+        else:
+            series = data[column]
+        if positions is not None:
+            series = series.iloc[positions]
+            if isinstance(series.dtype, pds.CategoricalDtype):
+                # отфильтрованные категории не должны попадать на оси графиков
+                series = series.cat.remove_unused_categories()
+        selected[column] = series
+    # столбцы не копируются (copy=False): построители графиков не изменяют переданные данные на месте,
+    # а числовые столбцы из кэша доступны только для чтения
+    return pds.DataFrame(selected, copy=False)
+
+
+VARIABLE_COLUMN = 'variable'  # столбец с названием показателя в длинном формате
+VALUE_COLUMN = 'value'  # столбец со значением показателя
+PIVOT_DROP_COLUMNS = ('unit',)  # столбцы, которые определяются показателем и не входят в ключ строки
+PIVOT_CACHE_SIZE = 2  # сколько широких таблиц хранится для повторного использования
+
+_pivot_cache = OrderedDict()
+
+
+def _row_codes(data, columns):
+    """
+    Номер сочетания значений столбцов для каждой строки (в порядке первого появления).
+    """
+    combined, renumbered = None, False
+    for column in columns:
+        series = data[column]
+        if isinstance(series.dtype, pds.CategoricalDtype):
+            codes, size = series.cat.codes.to_numpy().astype(np.int64), len(series.cat.categories)
+        else:
+            codes, uniques = pds.factorize(series)
+            codes, size = codes.astype(np.int64), len(uniques)
+        codes = codes + 1  # пропуск (-1) становится отдельным значением 0
+        if combined is None:
+            combined, renumbered = codes, False
+        else:
+            # после каждого шага сочетания перенумеровываются, поэтому произведение не переполняется
+            combined, _ = pds.factorize(combined * (size + 1) + codes)
+            combined, renumbered = combined.astype(np.int64), True
+    if combined is None:
+        return np.zeros(len(data), dtype=np.int64)
+    if not renumbered:
+        combined, _ = pds.factorize(combined)
+    return combined
+
+
+def pivot_wide(data, variable_column=VARIABLE_COLUMN, value_column=VALUE_COLUMN, index_columns=None):
+    """
+    Преобразует данные из длинного формата (показатель, значение в каждой строке)
+    в широкий: по одному числовому столбцу на каждый показатель.
+    Строки и показатели нумеруются целочисленными кодами, значения раскладываются
+    в матрицу за один векторный проход, без pivot_table по строковым столбцам.
+    Отсутствующие сочетания и нечисловые значения - NaN; при повторах берется последнее значение.
+
+    :param data: DataFrame в длинном формате
+    :param variable_column: Столбец с названиями показателей
+    :param value_column: Столбец со значениями
+    :param index_columns: Столбцы, задающие строку широкой таблицы
+                          (None - все, кроме показателя, значения и PIVOT_DROP_COLUMNS)
+    :return: DataFrame: столбцы index_columns и по столбцу на каждый показатель
+    """
+
+    if index_columns is None:
+        skip = {variable_column, value_column, *PIVOT_DROP_COLUMNS}
+        index_columns = [column for column in data.columns if column not in skip]
+    index_columns = list(index_columns)
+
+    rows = _row_codes(data, index_columns)
+    variables = data[variable_column]
+    if isinstance(variables.dtype, pds.CategoricalDtype):
+        columns, names = variables.cat.codes.to_numpy(), variables.cat.categories
+    else:
+        columns, names = pds.factorize(variables)
+    values = _to_numbers(data[value_column]).to_numpy(dtype=float, na_value=np.nan)
+
+    n_rows = rows.max() + 1 if len(rows) else 0
+    valid = columns >= 0
+    matrix = np.full((n_rows, len(names)), np.nan)
+    matrix[rows[valid], columns[valid]] = values[valid]
+
+    # значения столбцов-ключей берутся из первой строки каждого сочетания;
+    # коды идут в порядке появления, поэтому первая строка кода - та, где растет накопленный максимум
+    first = np.flatnonzero(np.diff(np.maximum.accumulate(rows), prepend=-1) > 0)
+    wide = {column: data[column].iloc[first].reset_index(drop=True) for column in index_columns}
+    for i, name in enumerate(names):
+        name = str(name)
+        if name in wide:
+            name = f"{name} ({variable_column})"  # показатель совпадает с названием столбца-ключа
+        wide[name] = matrix[:, i]
+    return pds.DataFrame(wide)
+
+
+def pivot_wide_cached(data, variable_column=VARIABLE_COLUMN, value_column=VALUE_COLUMN, index_columns=None):
+    """
+    pivot_wide с запоминанием результата: широкая таблица строится заново, только если
+    изменились исходные данные (хэш файла из load_data) или параметры.
+    Результат нельзя изменять - он используется повторно.
+    """
+
+    source = data.attrs.get('content_hash')
+    if source is None:
+        return pivot_wide(data, variable_column, value_column, index_columns)
+    key = (source, len(data), variable_column, value_column, None if index_columns is None else tuple(index_columns))
+    wide = _pivot_cache.get(key)
+    if wide is None:
+        wide = pivot_wide(data, variable_column, value_column, index_columns)
+        _pivot_cache[key] = wide
+        while len(_pivot_cache) > PIVOT_CACHE_SIZE:
+            _pivot_cache.popitem(last=False)
+    else:
+        _pivot_cache.move_to_end(key)
+    return wide
+
+
+SUMMARY_CACHE_SIZE = 2  # для скольких наборов данных сводки хранятся в памяти
+
+_summary_cache = OrderedDict()
+
+
+def _remember_summaries(data, summaries):
+    # сводки запоминаются в памяти и сохраняются в кэш рядом с данными файла
+    key = (data.attrs['content_hash'], len(data))
+    _summary_cache[key] = summaries
+    _summary_cache.move_to_end(key)
+    while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+        _summary_cache.popitem(last=False)
     try:
-        data.loc = pds.to_numeric(data, errors='coerce').fillna(0)
-        # data.loc[:, column] = data[column].fillna(0).astype(int)
+        data_cache.store_summaries(data.attrs['fingerprint'], summaries.to_arrays())
     except Exception as e:
-        print(f"Ошибка при обработке данных: {e}")
-    return data
\ No newline at end of file
+        print(f"Не удалось сохранить сводки в кэш: {e}")
+
+
+def column_summaries(data):
+    """
+    Сводки числовых столбцов данных (см. summaries.DatasetSummaries): гистограмма, минимум, максимум,
+    сумма, количество и эскиз квантилей. Для данных из load_data сводки вычисляются один раз и хранятся
+    рядом с кэшем файла; когда к файлу дописывают строки, load_data дополняет их только новыми строками.
+    Результат нельзя изменять - он используется повторно.
+    """
+
+    source = data.attrs.get('content_hash')
+    if source is None or 'fingerprint' not in data.attrs:
+        return DatasetSummaries.from_data(data)
+    summaries = _summary_cache.get((source, len(data)))
+    if summaries is not None:
+        _summary_cache.move_to_end((source, len(data)))
+        return summaries
+
+    arrays = data_cache.load_summaries(data.attrs['fingerprint'])
+    summaries = DatasetSummaries.from_arrays(arrays) if arrays is not None else None
+    if summaries is None or summaries.rows != len(data) or set(summaries.columns) != set(summary_columns(data)):
+        summaries = DatasetSummaries.from_data(data)
+    _remember_summaries(data, summaries)
+    return summaries
+
+
+def can_pivot(data, variable_column=VARIABLE_COLUMN, value_column=VALUE_COLUMN):
+    """
+    :return: True, если данные в длинном формате (есть столбцы показателя и значения).
+    """
+    return variable_column in data.columns and value_column in data.columns
@@ -0,0 +1,84 @@
+import numpy as np
+
+MAX_LINE_POINTS = 2000  # больше точек на одну линию график по ширине экрана не покажет
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, n_out):
+    """
+    Прореживание ряда методом Largest-Triangle-Three-Buckets.
+    Ряд делится на n_out - 2 корзины; из каждой выбирается точка, образующая треугольник
+    наибольшей площади с выбранной точкой предыдущей корзины и средней точкой следующей.
+    Первая и последняя точки сохраняются всегда.
+
+    :param x: Значения по оси X (по возрастанию).
+    :param y: Значения по оси Y.
+    :param n_out: Желаемое число точек.
+    :return: номера выбранных точек по возрастанию.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # границы корзин между первой и последней точкой
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    anchor = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+
+        # удвоенная площадь треугольника (anchor, точка корзины, среднее следующей корзины)
+        area = np.abs((x[anchor] - next_x) * (y[start:stop] - y[anchor])
+                      - (x[anchor] - x[start:stop]) * (next_y - y[anchor]))
+        anchor = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = anchor
+    return selected
+
+
+def minmax(x, y, n_out):
+    """
+    Прореживание ряда по корзинам с сохранением минимума и максимума в каждой корзине,
+    чтобы пики ряда остались на графике. Первая и последняя точки сохраняются всегда.
+
+    :param x: Значения по оси X (не используются, оставлены для единого интерфейса с lttb).
+    :param y: Значения по оси Y.
+    :param n_out: Желаемое число точек (по две на корзину).
+    :return: номера выбранных точек по возрастанию.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    n_buckets = (n_out - 2) // 2
+    buckets = np.arange(n) * n_buckets // n
+    # внутри каждой корзины точки упорядочены по y: первая - минимум, последняя - максимум
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets[order], np.arange(n_buckets))
+    stops = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate(([0, n - 1], order[starts], order[stops])))
+
+
+def downsample(x, y, max_points=MAX_LINE_POINTS, method='lttb'):
+    """
+    Выбирает не более max_points точек ряда для отрисовки.
+
+    :param x: Значения по оси X (по возрастанию).
+    :param y: Значения по оси Y.
+    :param max_points: Желаемое число точек; None - без прореживания.
+    :param method: 'lttb', 'minmax' или None - без прореживания.
+    :return: номера выбранных точек по возрастанию.
+    """
+    if method is None or max_points is None or len(y) <= max_points:
+        return np.arange(len(y))
+    if method == 'lttb':
+        return lttb(x, y, max_points)
+    if method == 'minmax':
+        return minmax(x, y, max_points)
+    raise ValueError(f"Неизвестный метод прореживания: {method}. Допустимые: {', '.join(METHODS)}")
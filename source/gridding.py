@@ -0,0 +1,196 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pds
+from source.lazy_import import lazy_module
+
+spatial = lazy_module('scipy.spatial')  # загружается при первой триангуляции
+
+AGGREGATIONS = ('last', 'first', 'mean', 'sum', 'min', 'max')
+INTERPOLATOR_CACHE_SIZE = 8  # сколько триангуляций хранить одновременно
+MAX_GRID_CELLS = 250_000  # бюджет отрисовки: максимальное число ячеек сетки в режиме 'auto'
+
+_interpolators = OrderedDict()
+
+
+def resolve_resolution(resolution, n_x, n_y, max_cells=MAX_GRID_CELLS):
+    """
+    Определяет размер сетки (число узлов по X и по Y).
+
+    :param resolution: Число узлов по каждой оси, пара (по X, по Y) или 'auto'.
+                       В режиме 'auto' сетка совпадает с числом уникальных значений,
+                       пока укладывается в бюджет max_cells, иначе пропорционально уменьшается.
+    :param n_x: Число уникальных значений X.
+    :param n_y: Число уникальных значений Y.
+    :param max_cells: Бюджет отрисовки в ячейках сетки для режима 'auto'.
+    :return: (узлов по X, узлов по Y)
+    """
+    if resolution == 'auto':
+        n_x, n_y = max(n_x, 2), max(n_y, 2)
+        if n_x * n_y <= max_cells:
+            return n_x, n_y
+        scale = np.sqrt(max_cells / (n_x * n_y))
+        return max(int(n_x * scale), 2), max(int(n_y * scale), 2)
+    if isinstance(resolution, (tuple, list)):
+        return int(resolution[0]), int(resolution[1])
+    return int(resolution), int(resolution)
+
+
+def _bin_centers(values, n_bins):
+    """
+    Заменяет числовые значения центрами равных интервалов, на которые разбит их диапазон.
+    """
+    low, high = np.nanmin(values), np.nanmax(values)
+    if high == low:
+        return values
+    edges = np.linspace(low, high, n_bins + 1)
+    bins = np.clip(((values - low) / (high - low) * n_bins).astype(np.int64), 0, n_bins - 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return np.where(np.isnan(values), np.nan, centers[bins])
+
+
+def build_z_matrix(x, y, z, aggregate='last', resolution=None, max_cells=MAX_GRID_CELLS):
+    """
+    Раскладывает точки (x, y, z) по сетке уникальных значений x и y без циклов Python.
+    Значения x и y кодируются целыми номерами, а z записывается в заранее созданный массив.
+
+    :param x: Значения по оси X.
+    :param y: Значения по оси Y.
+    :param z: Значения Z.
+    :param aggregate: Правило для повторяющихся точек (x, y): 'last' (как при построчном
+                      заполнении), 'first', 'mean', 'sum', 'min' или 'max'.
+    :param resolution: None - ячейка на каждое уникальное значение; число, пара или 'auto'
+                       (см. resolve_resolution) - числовые оси с большим числом уникальных
+                       значений разбиваются на интервалы, и точки в интервале агрегируются.
+    :param max_cells: Бюджет отрисовки в ячейках сетки для режима 'auto'.
+    :return: DataFrame: строки - отсортированные значения y, столбцы - отсортированные значения x,
+             пустые ячейки - NaN.
+    """
+    if aggregate not in AGGREGATIONS:
+        raise ValueError(f"Неизвестное правило агрегирования: {aggregate}. Допустимые: {', '.join(AGGREGATIONS)}")
+
+    x, y = np.asarray(x), np.asarray(y)
+    if resolution is not None:
+        n_x, n_y = resolve_resolution(resolution, len(pds.unique(x)), len(pds.unique(y)), max_cells)
+        # сжимать можно только числовые оси; категориальные остаются как есть
+        if np.issubdtype(x.dtype, np.number) and n_x < len(pds.unique(x)):
+            x = _bin_centers(x.astype(float), n_x)
+        if np.issubdtype(y.dtype, np.number) and n_y < len(pds.unique(y)):
+            y = _bin_centers(y.astype(float), n_y)
+
+    x_codes, x_values = pds.factorize(x, sort=True)
+    y_codes, y_values = pds.factorize(y, sort=True)
+    z = np.asarray(z, dtype=float)
+    if not (len(x_codes) == len(y_codes) == len(z)):
+        raise ValueError("Все входные массивы должны иметь одинаковую длину.")
+
+    # точки с пропущенными координатами на сетку не попадают
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    if not valid.all():
+        x_codes, y_codes, z = x_codes[valid], y_codes[valid], z[valid]
+
+    n_x, n_y = len(x_values), len(y_values)
+    cells = y_codes.astype(np.int64) * n_x + x_codes
+    matrix = np.full(n_x * n_y, np.nan)
+
+    if aggregate in ('last', 'first'):
+        # номер первой/последней точки в каждой ячейке
+        if aggregate == 'last':
+            unique_cells, reversed_idx = np.unique(cells[::-1], return_index=True)
+            matrix[unique_cells] = z[len(cells) - 1 - reversed_idx]
+        else:
+            unique_cells, first_idx = np.unique(cells, return_index=True)
+            matrix[unique_cells] = z[first_idx]
+    else:
+        # пропуски в z при агрегировании не учитываются
+        present = ~np.isnan(z)
+        cells, z = cells[present], z[present]
+        counts = np.bincount(cells, minlength=n_x * n_y)
+        filled = counts > 0
+        if aggregate in ('sum', 'mean'):
+            sums = np.bincount(cells, weights=z, minlength=n_x * n_y)
+            matrix[filled] = sums[filled] / counts[filled] if aggregate == 'mean' else sums[filled]
+        else:
+            reducer = np.minimum if aggregate == 'min' else np.maximum
+            result = np.full(n_x * n_y, np.inf if aggregate == 'min' else -np.inf)
+            reducer.at(result, cells, z)
+            matrix[filled] = result[filled]
+
+    return pds.DataFrame(matrix.reshape(n_y, n_x), index=y_values, columns=x_values)
+
+
+class GridInterpolator:
+    """
+    Линейная интерполяция разбросанных точек (x, y) на регулярную сетку,
+    эквивалентная scipy.interpolate.griddata(..., method='linear').
+    Триангуляция Делоне и барицентрические веса узлов сетки вычисляются один раз,
+    после чего интерполяция нового Z - это только взвешенная сумма значений вершин.
+    """
+
+    def __init__(self, x, y, resolution=100):
+        """
+        :param x: Значения по оси X.
+        :param y: Значения по оси Y.
+        :param resolution: Число узлов сетки по каждой оси или пара (по X, по Y).
+        """
+        points = np.column_stack((x, y))
+        n_x, n_y = resolve_resolution(resolution, 0, 0)
+        self.grid_x = np.linspace(np.min(x), np.max(x), n_x)
+        self.grid_y = np.linspace(np.min(y), np.max(y), n_y)
+        mesh_x, mesh_y = np.meshgrid(self.grid_x, self.grid_y)
+        targets = np.column_stack((mesh_x.ravel(), mesh_y.ravel()))
+
+        triangulation = spatial.Delaunay(points)
+        simplex = triangulation.find_simplex(targets)
+        self.outside = simplex < 0  # узлы сетки вне выпуклой оболочки точек
+        simplex = np.where(self.outside, 0, simplex)
+
+        # барицентрические координаты узлов сетки в найденных треугольниках
+        transform = triangulation.transform[simplex]
+        bary = np.einsum('ijk,ik->ij', transform[:, :2], targets - transform[:, 2])
+        self.weights = np.column_stack((bary, 1 - bary.sum(axis=1)))
+        self.vertices = triangulation.simplices[simplex]
+        self.shape = mesh_x.shape
+
+    def __call__(self, z):
+        """
+        :param z: Значения Z в исходных точках.
+        :return: двумерный массив Z на сетке (NaN вне выпуклой оболочки точек).
+        """
+        z = np.asarray(z, dtype=float)
+        grid_z = np.einsum('ij,ij->i', z[self.vertices], self.weights)
+        grid_z[self.outside] = np.nan
+        return grid_z.reshape(self.shape)
+
+
+def get_interpolator(x, y, resolution=100, max_cells=MAX_GRID_CELLS):
+    """
+    Возвращает GridInterpolator для набора точек (x, y), переиспользуя ранее построенные.
+    Ключ кэша - содержимое массивов x и y и разрешение сетки, поэтому смена столбца Z
+    или цветовой шкалы при тех же X/Y не приводит к повторной триангуляции.
+
+    :param x: Значения по оси X.
+    :param y: Значения по оси Y.
+    :param resolution: Число узлов сетки по каждой оси, пара (по X, по Y) или 'auto'
+                       (по числу уникальных значений в пределах max_cells, см. resolve_resolution).
+    :param max_cells: Бюджет отрисовки в ячейках сетки для режима 'auto'.
+    :return: GridInterpolator
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    y = np.ascontiguousarray(y, dtype=float)
+    resolution = resolve_resolution(resolution, len(np.unique(x)), len(np.unique(y)), max_cells)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(x.tobytes())
+    hasher.update(y.tobytes())
+    key = (hasher.hexdigest(), len(x), resolution)
+
+    interpolator = _interpolators.get(key)
+    if interpolator is None:
+        interpolator = GridInterpolator(x, y, resolution)
+        _interpolators[key] = interpolator
+        if len(_interpolators) > INTERPOLATOR_CACHE_SIZE:
+            _interpolators.popitem(last=False)  # удаляем давно не использованную триангуляцию
+    else:
+        _interpolators.move_to_end(key)
+    return interpolator
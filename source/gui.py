@@ -1,6 +1,12 @@
-from PyQt5.QtWidgets import QMainWindow, QPushButton, QFileDialog, QVBoxLayout, QWidget, QComboBox, QLabel, QMessageBox
-from source.data_processing import load_data, process_data, process_all_data  # импортируем загрузчик данных
-import source.visualizations_max as viz  # импортируем создание графиков
+from PyQt5.QtWidgets import QMainWindow, QPushButton, QFileDialog, QVBoxLayout, QWidget, QComboBox, QLabel, QMessageBox, \
+    QCheckBox, QProgressBar, QHBoxLayout
+from source.data_processing import process_all_data, read_columns, stream_unique_values, \
+    load_data_streaming, ColumnIndex, NumericColumns, project, can_pivot, pivot_wide_cached  # импортируем загрузчик данных
+from source.workers import DataLoadWorker  # фоновая загрузка данных
+from source import registry  # реестр построителей графиков
+from source.render_cache import RenderCache, render_key, dataset_hash  # кэш готовых графиков
+from source.aggregation import Aggregator, REDUCERS, NO_AGGREGATION  # агрегация перед построением
+from source.binning import HistogramCache, BIN_METHODS, DEFAULT_BINS  # интервалы гистограмм
 import pandas as pds
 
 class MainWindow(QMainWindow):
@@ -9,6 +15,27 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Data Visualization App")  # название приложения
         self.setGeometry(100, 100, 400, 400)  # размеры главного окна
 
+        self.data = None  # загруженные данные
+        self.column_index = None  # индекс значений столбцов для фильтрации
+        self.numeric_columns = None  # кэш столбцов, преобразованных в числа
+        self.wide_data = None  # данные в широком формате: по столбцу на каждый показатель (см. pivot_wide)
+        self.wide_column_index = None
+        self.wide_numeric_columns = None
+        self.pivot_columns = []  # столбцы показателей, которые есть только в широкой таблице
+        self.file_name = None  # путь к загруженному файлу
+        self.streaming = False  # данные читаются из файла по блокам, в памяти хранится только заголовок
+        self.load_worker = None  # поток фоновой загрузки
+        self.figure = None  # фигура Matplotlib, встроенная в окно (создается при первом графике)
+        self.canvas = None  # холст Qt, на котором отображается фигура
+        self.toolbar = None  # панель инструментов холста (масштаб, сохранение)
+        self.plotly_view = None  # встроенное отображение графиков Plotly (создается при первом графике)
+        self.plotly_view_available = True  # установлен ли PyQtWebEngine
+        self.render_cache = RenderCache()  # готовые графики по параметрам построения
+        self.dataset_hash = None  # хэш содержимого загруженного файла (вычисляется при первом графике)
+        self.last_plotly_json = None  # JSON последнего построенного графика Plotly
+        self.aggregator = Aggregator()  # группировки Y по X для выбранных данных
+        self.histograms = HistogramCache()  # интервалы гистограмм для выбранных данных
+
         layout = QVBoxLayout()  # вертикальная компоновка элементов
 
         # Кнопка для загрузки данных
@@ -16,6 +43,19 @@ class MainWindow(QMainWindow):
         self.load_button.clicked.connect(self.data_loader)  # связываем нажатие кнопки с загрузкой данных
         layout.addWidget(self.load_button)  # добавляем кнопку в главное окно
 
+        # Флажок потоковой загрузки CSV: файл читается блоками при каждом построении графика
+        self.streaming_checkbox = QCheckBox("Streaming CSV (low memory)")
+        layout.addWidget(self.streaming_checkbox)
+
+        # Индикатор и кнопка отмены фоновой загрузки (видны только во время загрузки)
+        self.load_progress = QProgressBar()
+        self.load_progress.setVisible(False)
+        layout.addWidget(self.load_progress)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_loading)
+        self.cancel_button.setVisible(False)
+        layout.addWidget(self.cancel_button)
+
         # Метка и выпадающий список для выбора фильтра по оси X
         self.x_label = QLabel("Select X Column:")
         layout.addWidget(self.x_label)
@@ -41,16 +81,19 @@ class MainWindow(QMainWindow):
         self.library_label = QLabel("Select Visualization Library:")
         layout.addWidget(self.library_label)
         self.library_combo = QComboBox()
-        self.library_combo.addItems(["matplotlib", "seaborn", "plotly"])  # Добавление библиотек
+        self.library_combo.addItems(registry.libraries())  # Добавление установленных библиотек
         layout.addWidget(self.library_combo)
 
         # Выпадающий список для выбора типа графика
         self.plot_type_label = QLabel("Select Plot Type:")
         layout.addWidget(self.plot_type_label)
         self.plot_type_combo = QComboBox()
-        self.plot_type_combo.addItems(viz.graphics_list)  # Добавление типов графиков
+        self.plot_type_combo.addItems(registry.plot_types(self.library_combo.currentText()))  # Добавление типов графиков
         layout.addWidget(self.plot_type_combo)
 
+        # Типы графиков зависят от выбранной библиотеки
+        self.library_combo.currentIndexChanged.connect(self.update_plot_types)
+
         # Метка и выпадающий список для выбора столбца Z
         self.z_label = QLabel("Select Z Column:")  # добавляем метку для Z
         self.z_label.setVisible(False)  # скрываем метку по умолчанию
@@ -59,35 +102,135 @@ class MainWindow(QMainWindow):
         self.z_combo.setVisible(False)  # скрываем его по умолчанию
         layout.addWidget(self.z_combo)
 
-        # Подключаем обработчик для изменения видимости Z ComboBox
+        # Выпадающий список агрегации: Y сводится по значениям X (и серий) перед построением
+        self.aggregate_label = QLabel("Aggregate:")
+        layout.addWidget(self.aggregate_label)
+        self.aggregate_combo = QComboBox()
+        self.aggregate_combo.addItems([NO_AGGREGATION, *REDUCERS])
+        layout.addWidget(self.aggregate_combo)
+
+        # Выпадающий список для выбора столбца серий при агрегации
+        self.series_label = QLabel("Series Column:")
+        layout.addWidget(self.series_label)
+        self.series_combo = QComboBox()
+        self.series_combo.addItem("Нет")
+        layout.addWidget(self.series_combo)
+
+        # Выпадающий список способа разбиения на интервалы для гистограмм
+        self.bins_label = QLabel("Bins:")
+        layout.addWidget(self.bins_label)
+        self.bins_combo = QComboBox()
+        self.bins_combo.addItems(BIN_METHODS)
+        layout.addWidget(self.bins_combo)
+
+        # Подключаем обработчик для изменения видимости Z ComboBox и агрегации
         self.plot_type_combo.currentIndexChanged.connect(self.update_z_combobox_visibility)
+        self.aggregate_combo.currentIndexChanged.connect(self.update_z_combobox_visibility)
 
         # Кнопка для вывода графика
         self.plot_button = QPushButton("Plot Data")
         self.plot_button.clicked.connect(self.plot_data)  # связываем кнопку с методом plot_data
         layout.addWidget(self.plot_button)
 
+        controls = QWidget()  # панель элементов управления слева
+        controls.setLayout(layout)
+        controls.setFixedWidth(380)
+
+        # Справа располагается область графика; холст добавляется в нее при первом построении
+        self.main_layout = QHBoxLayout()
+        self.main_layout.addWidget(controls)
+        self.plot_layout = QVBoxLayout()
+        self.main_layout.addLayout(self.plot_layout, 1)
+
         container = QWidget()  # создание контейнера для компоновщика
-        container.setLayout(layout)  # применение вертикальной компоновки к контейнеру
+        container.setLayout(self.main_layout)  # применение компоновки к контейнеру
         self.setCentralWidget(container)  # назначение контейнера центральным
+        self.update_z_combobox_visibility()  # начальная видимость Z и агрегации для выбранного графика
 
 
     def data_loader(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open Data File", "",
                                                    'Excel Files (*.xlsx);;CSV Files (*.csv)')
         if file_name:
+            if self.streaming_checkbox.isChecked() and file_name.endswith('.csv'):
+                try:
+                    # В потоковом режиме в памяти хранится только заголовок файла
+                    self.on_data_loaded(pds.DataFrame(columns=read_columns(file_name)), file_name, streaming=True)
+                except Exception as e:
+                    self.on_load_failed(str(e))
+                return
+
+            # Загружаем данные в отдельном потоке, чтобы окно не зависало
+            self.load_worker = DataLoadWorker(file_name, self)
+            self.load_worker.progress.connect(self.on_load_progress)
+            self.load_worker.loaded.connect(lambda data: self.on_data_loaded(data, file_name))
+            self.load_worker.failed.connect(self.on_load_failed)
+            self.load_worker.cancelled.connect(self.on_load_cancelled)
+            self.load_worker.finished.connect(self.on_load_finished)
+            self.set_loading(True)
+            self.load_worker.start()
+
+    def set_loading(self, loading):
+        # Переключение интерфейса между режимом загрузки и обычным режимом
+        self.load_button.setEnabled(not loading)
+        self.plot_button.setEnabled(not loading)
+        self.load_progress.setRange(0, 0)  # неопределенный прогресс до первого сигнала
+        self.load_progress.setVisible(loading)
+        self.cancel_button.setVisible(loading)
+
+    def cancel_loading(self):
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+
+    def on_load_progress(self, done, total):
+        if total > 0:
+            # QProgressBar работает с int, поэтому переводим байты в проценты
+            self.load_progress.setRange(0, 100)
+            self.load_progress.setFormat("%p%")
+            self.load_progress.setValue(int(done * 100 / total))
+        else:
+            self.load_progress.setFormat(f"{done // 1024} KB")
+
+    def on_data_loaded(self, data, file_name, streaming=False):
+        self.data = data  # Сохраняем данные в атрибуте класса
+        self.streaming = streaming
+        self.column_index = ColumnIndex(data)  # индекс старых данных больше не нужен
+        self.numeric_columns = NumericColumns(data)
+        self.file_name = file_name
+        self.dataset_hash = None
+        self.aggregator.clear()  # группировки старых данных больше не нужны
+        self.histograms.clear()
+
+        # Данные в длинном формате дополнительно разворачиваются в широкую таблицу,
+        # чтобы показатели можно было выбирать как отдельные столбцы X, Y, Z
+        self.wide_data, self.wide_column_index, self.wide_numeric_columns, self.pivot_columns = None, None, None, []
+        if not self.streaming and can_pivot(data):
             try:
-                self.data = load_data(file_name)  # Загружаем данные и сохраняем в атрибуте класса
-                print("Data loaded successfully.")  # Сообщение об успешной загрузке данных
-                self.update_comboboxes()  # Обновляем выпадающие списки на основе загруженных данных
+                self.wide_data = pivot_wide_cached(data)
+                self.wide_column_index = ColumnIndex(self.wide_data)
+                self.wide_numeric_columns = NumericColumns(self.wide_data)
+                self.pivot_columns = [column for column in self.wide_data.columns if column not in data.columns]
             except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке данных: {str(e)}")
+                print(f"Ошибка при преобразовании данных в широкий формат: {e}")
+        print("Data loaded successfully.")  # Сообщение об успешной загрузке данных
+        self.update_comboboxes()  # Обновляем выпадающие списки на основе загруженных данных
+
+    def on_load_failed(self, message):
+        QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке данных: {message}")
+
+    def on_load_cancelled(self):
+        print("Загрузка данных отменена.")
+
+    def on_load_finished(self):
+        self.set_loading(False)
+        self.load_worker.deleteLater()
+        self.load_worker = None
 
 
     def update_comboboxes(self):
         # Обновление выпадающих списков на основе загруженных данных
         if self.data is not None:
-            columns = set(self.data.columns)  # Получаем уникальные названия столбцов
+            columns = list(set(self.data.columns)) + self.pivot_columns  # столбцы и показатели широкой таблицы
             self.x_combo.clear()  # Очищаем старые элементы
             self.x_combo.addItems(columns)  # Добавляем новые элементы
 
@@ -97,20 +240,48 @@ class MainWindow(QMainWindow):
             self.z_combo.clear()  # Очищаем старые элементы
             self.z_combo.addItems(columns)  # Добавляем новые элементы
 
+            self.series_combo.clear()
+            self.series_combo.addItem("Нет")
+            self.series_combo.addItems(columns)
+
             # Обновляем фильтры после обновления столбцов
             self.update_filters_x()
             self.update_z_combobox_visibility()  # Обновляем видимость Z ComboBox
 
 
-    def update_z_combobox_visibility(self):
-        # Обновление видимости Z ComboBox в зависимости от выбранного типа графика
+    def update_plot_types(self):
+        # Обновление списка типов графиков по реестру выбранной библиотеки
         selected_plot_type = self.plot_type_combo.currentText()
-        if selected_plot_type == "Contour":
-            self.z_label.setVisible(True)
-            self.z_combo.setVisible(True)
-        else:
-            self.z_label.setVisible(False)
-            self.z_combo.setVisible(False)
+        self.plot_type_combo.clear()
+        self.plot_type_combo.addItems(registry.plot_types(self.library_combo.currentText()))
+        self.plot_type_combo.setCurrentText(selected_plot_type)  # сохраняем выбор, если такой тип есть
+
+    def selected_chart(self):
+        # Построитель выбранного графика из реестра (None, если ничего не выбрано)
+        library, plot_type = self.library_combo.currentText(), self.plot_type_combo.currentText()
+        if not library or not plot_type:
+            return None
+        return registry.get_chart(library, plot_type)
+
+    def update_z_combobox_visibility(self):
+        # Обновление видимости Z ComboBox в зависимости от столбцов выбранного графика
+        chart = self.selected_chart()
+        needs_z = chart is not None and 'z' in chart.columns
+        self.z_label.setVisible(needs_z)
+        self.z_combo.setVisible(needs_z)
+
+        # Агрегация доступна для графиков по выборке с осью X (столбчатые и линейные)
+        aggregatable = chart is not None and chart.aggregatable
+        self.aggregate_label.setVisible(aggregatable)
+        self.aggregate_combo.setVisible(aggregatable)
+        uses_series = aggregatable and self.aggregate_combo.currentText() != NO_AGGREGATION
+        self.series_label.setVisible(uses_series)
+        self.series_combo.setVisible(uses_series)
+
+        # Способ разбиения на интервалы нужен только гистограммам
+        binned = chart is not None and chart.binned
+        self.bins_label.setVisible(binned)
+        self.bins_combo.setVisible(binned)
 
     def update_filters_x(self):
         x_column = self.x_combo.currentText()
@@ -118,7 +289,11 @@ class MainWindow(QMainWindow):
 
         if x_column and self.data is not None:
             # Получаем уникальные значения и преобразуем их в строки
-            unique_x_values = set(self.data[x_column].dropna())
+            if self.streaming:
+                unique_x_values = stream_unique_values(self.file_name, x_column)
+            else:
+                _, column_index, _ = self.table_for([x_column])
+                unique_x_values = column_index.values(x_column)
             print(f"Unique X values: {unique_x_values}")
 
             # Преобразуем значения в строки
@@ -128,22 +303,100 @@ class MainWindow(QMainWindow):
             self.x_filter_combo.addItem("Все")
             self.x_filter_combo.addItems(sorted(unique_x_values_str))
 
+    def table_for(self, columns):
+        # Таблица, по которой строится график: широкая, если выбран хотя бы один показатель
+        # :return: (DataFrame, ColumnIndex, NumericColumns)
+        if any(column in self.pivot_columns for column in columns):
+            missing = [column for column in columns if column and column not in self.wide_data.columns]
+            if missing:
+                raise ValueError(f"Столбцы {', '.join(missing)} нельзя использовать вместе с показателями "
+                                 f"широкой таблицы")
+            return self.wide_data, self.wide_column_index, self.wide_numeric_columns
+        return self.data, self.column_index, self.numeric_columns
+
+    def ensure_canvas(self):
+        # Создает встроенный холст Matplotlib при первом построении графика.
+        # Matplotlib импортируется здесь, а не при запуске, чтобы не замедлять открытие окна
+        if self.canvas is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+            from source.visualizations_max import set_target_figure
+
+            self.figure = Figure(figsize=(10, 7))
+            self.canvas = FigureCanvasQTAgg(self.figure)
+            self.toolbar = NavigationToolbar2QT(self.canvas, self)
+            self.plot_layout.addWidget(self.toolbar)
+            self.plot_layout.addWidget(self.canvas)
+            set_target_figure(self.figure)  # графики перерисовываются на этой фигуре, а не в новых окнах
+        self.show_plot_widgets(self.toolbar, self.canvas)
+        return self.canvas
+
+    def ensure_plotly_view(self):
+        # Создает встроенное отображение Plotly при первом графике Plotly.
+        # Без PyQtWebEngine графики, как и раньше, открываются в браузере
+        if self.plotly_view is None and self.plotly_view_available:
+            try:
+                from source.plotly_view import PlotlyView
+            except ImportError as e:
+                print(f"Графики Plotly будут открываться в браузере: {e}")
+                self.plotly_view_available = False
+                return None
+            self.plotly_view = PlotlyView(self)  # в окно передается только JSON фигуры
+            self.plot_layout.addWidget(self.plotly_view)
+        if self.plotly_view is not None:
+            self.show_plot_widgets(self.plotly_view)
+        return self.plotly_view
+
+    def show_plotly_figure(self, fig):
+        # Получает фигуру от функций построения Plotly (см. set_plotly_renderer)
+        self.last_plotly_json = fig.to_json()
+        self.show_plotly_json(self.last_plotly_json)
+
+    def show_plotly_json(self, figure_json):
+        if self.ensure_plotly_view() is not None:
+            self.plotly_view.show_json(figure_json)
+        else:
+            import plotly.io as pio
+            pio.from_json(figure_json).show()  # без PyQtWebEngine - в браузере
+
+    def show_cached_render(self, kind, payload):
+        # Показывает готовый график Plotly из кэша без повторного построения (JSON фигуры остается интерактивным)
+        if kind == 'json':
+            self.show_plotly_json(payload.decode('utf-8'))
+
+    def cache_render(self, key, chart):
+        # Сохраняет JSON построенного графика Plotly. Графики Matplotlib и Seaborn не кэшируются:
+        # картинка теряет оси и масштабирование панели инструментов и зависит от размера холста;
+        # для них повторно используются подготовленные данные (числовые столбцы, агрегации, гистограммы)
+        if chart.uses_web_view and self.last_plotly_json is not None:
+            self.render_cache.put(key, 'json', self.last_plotly_json)
+
+    def show_plot_widgets(self, *widgets):
+        # Показывает в области графика только указанные виджеты
+        for widget in (self.toolbar, self.canvas, self.plotly_view):
+            if widget is not None:
+                widget.setVisible(widget in widgets)
+        self.resize(max(self.width(), 1200), max(self.height(), 750))
+
     def plot_data(self):
-        if self.data is None or self.data.empty:
+        if self.data is None or (self.data.empty and not self.streaming):
             print("Сначала загрузите данные.")
             return
 
+        # Получаем выбранный график из реестра
+        chart = self.selected_chart()
+        if chart is None:
+            print("Пожалуйста, выберите библиотеку и тип графика.")
+            return
+        needs_z = 'z' in chart.columns
+
         # Получаем выбранные столбцы для осей X и Y
         x_column = self.x_combo.currentText()
         y_column = self.y_combo.currentText()
-        z_column = self.z_combo.currentText() if self.z_combo.isVisible() else ""
-
-        # Получаем выбранную библиотеку и тип графика
-        selected_library = self.library_combo.currentText()
-        selected_plot_type = self.plot_type_combo.currentText()
+        z_column = self.z_combo.currentText() if needs_z else ""
 
         # Проверяем, что выбранные столбцы не пустые
-        if selected_plot_type == "Contour":
+        if needs_z:
             if x_column == "" or y_column == "" or z_column == "":
                 print("Пожалуйста, выберите столбцы для осей X, Y, Z.")
                 return
@@ -154,24 +407,83 @@ class MainWindow(QMainWindow):
         # Получаем выбранные значения для фильтрации
         x_filter_value = self.x_filter_combo.currentText()
 
-        # Фильтруем данные
-        all_data = self.data.copy()  # копируем датасет
-        if x_filter_value == "Все":
-            filtered_data = all_data  # Если выбрано "Все", используем все данные
+        # Агрегация Y по X (и столбцу серий) перед построением
+        aggregate = self.aggregate_combo.currentText() if chart.aggregatable else NO_AGGREGATION
+        series_column = self.series_combo.currentText() if aggregate != NO_AGGREGATION else "Нет"
+        series_column = None if series_column in ("Нет", "", x_column) else series_column
+        bin_method = self.bins_combo.currentText() if chart.binned else None
+
+        # Тот же график Plotly для тех же данных и параметров показываем из кэша
+        if self.dataset_hash is None:
+            self.dataset_hash = dataset_hash(self.data, self.file_name)
+        render = render_key(self.dataset_hash, chart.library, chart.plot_type,
+                            {'x': x_column, 'y': y_column, 'z': z_column},
+                            None if x_filter_value == "Все" else x_filter_value,
+                            {'aggregate': aggregate, 'series': series_column, 'bins': bin_method})
+        cached = self.render_cache.get(render) if chart.uses_web_view else None
+        if cached is not None:
+            self.show_cached_render(*cached)
+            return
+
+        # Фильтруем данные, оставляя только нужные для графика столбцы
+        used_columns = list(dict.fromkeys(c for c in (x_column, y_column, z_column, series_column) if c))
+        # Для гистограммы Y не приводится к целым: значения преобразуются так же, как в сводках столбцов
+        # (не числа и пропуски пропускаются, дробная часть сохраняется, см. binning.finite_values)
+        numeric_y = [] if chart.binned else [y_column]
+        if self.streaming:
+            # Читаем файл блоками, оставляя только нужные столбцы и строки
+            if chart.filtered:
+                filtered_data = load_data_streaming(self.file_name, columns=used_columns, numeric_columns=numeric_y,
+                                                    x_column=x_column,
+                                                    x_filter_value=None if x_filter_value == "Все" else x_filter_value)
+                all_data = None
+            else:
+                # график по всем строкам: файл читается один раз, в числа столбцы переводит process_all_data
+                filtered_data = all_data = load_data_streaming(self.file_name, columns=used_columns)
+            numeric_columns = None  # в потоковом режиме столбцы каждый раз читаются из файла
         else:
-            filtered_data = all_data[all_data[x_column] == x_filter_value]
+            try:
+                data, column_index, numeric_columns = self.table_for(used_columns)
+            except ValueError as e:
+                print(e)
+                return
+            # Если выбрано "Все", используем все строки, иначе - выборку по индексу значений.
+            # Столбец Y берется из кэша уже преобразованным в числа (как в process_data)
+            positions = None if x_filter_value == "Все" else column_index.positions(x_column, x_filter_value)
+            filtered_data = project(data, used_columns, numeric_columns=numeric_y, positions=positions,
+                                    numeric_cache=numeric_columns)
+            all_data = project(data, used_columns) if not chart.filtered else None
 
         # Проверяем, есть ли данные после фильтрации
         if filtered_data.empty:
             print("Нет данных для выбранных фильтров.")
             return
 
-        # Обрабатываем данные по выбранному Y
+        table = 'stream' if self.streaming else ('wide' if data is self.wide_data else 'long')
+        if aggregate != NO_AGGREGATION:
+            # Вместо строки на каждую запись - строка на группу; группировка запоминается,
+            # поэтому при смене только функции агрегации данные заново не группируются
+            try:
+                filtered_data = self.aggregator.aggregate(filtered_data, x_column, y_column, aggregate,
+                                                          series_column, key=(table, x_filter_value))
+            except Exception as e:
+                print(f"Ошибка при агрегации данных: {e}")
+                return
+
+        # Столбец Y уже преобразован в числа при выборке, обрабатываем данные для Z
+        options = {}
+        if series_column is not None:
+            options['series_column'] = series_column  # серии показываются цветом и легендой
         try:
-            # Убедитесь, что вы возвращаете DataFrame, а не Series
-            filtered_data = process_data(filtered_data, y_column)  # Обработка выбранного Y
-            if self.z_combo.isVisible():
-                filtered_all_data = process_all_data(all_data)  # Обработка Z
+            if chart.binned:
+                # Интервалы гистограммы считаются один раз для данных и фильтра и подходят всем библиотекам;
+                # для всех строк и для выборки - одним способом, поэтому границы интервалов согласованы
+                # выборка зависит от столбца X и значения фильтра, поэтому оба входят в ключ
+                options['histogram'] = self.histograms.histogram(filtered_data, y_column, DEFAULT_BINS, bin_method,
+                                                                 key=(table, x_column, x_filter_value))
+            if not chart.filtered:
+                # X, Y и Z в числа; преобразованные столбцы запоминаются для следующих графиков
+                filtered_all_data = process_all_data(all_data, numeric_cache=numeric_columns)
                 # Передаем данные в виде DataFrame
 
         except Exception as e:
@@ -180,35 +492,20 @@ class MainWindow(QMainWindow):
 
 
 
-        # Вызов функции для построения графика в зависимости от выбранной библиотеки и типа графика
+        self.draw_chart(chart, render, filtered_data if chart.filtered else filtered_all_data,
+                        {'x': x_column, 'y': y_column, 'z': z_column}, **options)
+
+    def draw_chart(self, chart, render, data, columns, **options):
+        # Вызов функции построения графика, найденной в реестре по библиотеке и типу графика
         try:
-            if selected_library == "matplotlib":
-                if selected_plot_type == "Bar Chart":
-                    viz.create_bar_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Line Chart":
-                    viz.create_line_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Histogram":
-                    viz.create_histogram(filtered_data, y_column)
-                elif selected_plot_type == "Contour":
-                    viz.create_contour_plot(filtered_all_data, x_column, y_column, z_column)
-            elif selected_library == "seaborn":
-                if selected_plot_type == "Bar Chart":
-                    viz.create_seaborn_bar_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Line Chart":
-                    viz.create_seaborn_line_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Histogram":
-                    viz.create_seaborn_histogram(filtered_data, y_column)
-                elif selected_plot_type == "Contour":
-                    viz.create_seaborn_contour_plot(filtered_all_data, x_column, y_column, z_column)
-            elif selected_library == "plotly":
-                if selected_plot_type == "Bar Chart":
-                    viz.create_plotly_bar_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Line Chart":
-                    viz.create_plotly_line_chart(filtered_data, x_column, y_column)
-                elif selected_plot_type == "Histogram":
-                    viz.create_plotly_histogram(filtered_data, y_column)
-                elif selected_plot_type == "Contour":
-                    viz.create_plotly_contour(filtered_all_data, x_column, y_column, z_column)
+            if chart.uses_figure:
+                self.ensure_canvas()  # графики Matplotlib и Seaborn выводятся в окне приложения
+            elif chart.uses_web_view:
+                from source.visualizations_max import set_plotly_renderer
+                set_plotly_renderer(self.show_plotly_figure)
+                self.last_plotly_json = None
+            chart(data, columns, **options)
+            self.cache_render(render, chart)
         except Exception as e:
             print(f"Error occurred while plotting: {e}")
 
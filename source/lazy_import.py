@@ -0,0 +1,67 @@
+import importlib
+import threading
+
+_modules = {}
+
+
+class LazyModule:
+    """
+    Заместитель модуля: сам модуль импортируется при первом обращении к его атрибутам.
+    Позволяет не загружать тяжелые библиотеки построения графиков до первого графика.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """
+        Импортирует модуль, если он еще не загружен.
+        :return: модуль
+        """
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_module(name):
+    """
+    Возвращает заместитель модуля (один и тот же для одного имени).
+    :param name: Полное имя модуля, например 'matplotlib.pyplot'
+    :return: LazyModule
+    """
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = LazyModule(name)
+    return module
+
+
+def prewarm(names=None):
+    """
+    Импортирует отложенные модули в фоновом потоке, пока пользователь работает с окном.
+    :param names: Имена модулей (None - все созданные через lazy_module)
+    :return: запущенный поток
+    """
+    modules = [lazy_module(name) for name in names] if names is not None else list(_modules.values())
+
+    def load_all():
+        for module in modules:
+            try:
+                module.load()
+            except ImportError as e:
+                print(f"Не удалось заранее загрузить модуль {module._name}: {e}")
+
+    thread = threading.Thread(target=load_all, name='prewarm', daemon=True)
+    thread.start()
+    return thread
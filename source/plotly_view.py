@@ -0,0 +1,78 @@
+import os
+from PyQt5.QtCore import QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineView  # пакет PyQtWebEngine, устанавливается отдельно от PyQt5
+
+
+def plotly_bundle_dir():
+    """
+    :return: каталог с plotly.min.js, поставляемым вместе с пакетом plotly (доступен без интернета).
+    """
+    import plotly
+    return os.path.join(os.path.dirname(plotly.__file__), 'package_data')
+
+
+# Страница загружается один раз; библиотека plotly.js подключается из локального файла
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="plotly.min.js"></script>
+<style>html, body, #plot {margin: 0; width: 100%; height: 100%; overflow: hidden;}</style>
+</head>
+<body><div id="plot"></div></body>
+</html>
+"""
+
+
+class PlotlyView(QWebEngineView):
+    """
+    Отображение графиков Plotly внутри окна приложения.
+
+    plotly.js загружается один раз при создании виджета, после чего каждому графику
+    передается только JSON фигуры, а график обновляется на месте через Plotly.react.
+    Не создает HTML-файлов и не открывает браузер.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ready = False
+        self._pending = None  # фигура, полученная до окончания загрузки страницы
+        self.loadFinished.connect(self._on_load_finished)
+        self.setHtml(PAGE, QUrl.fromLocalFile(plotly_bundle_dir() + os.sep))
+
+    def _on_load_finished(self, ok):
+        if not ok:
+            print("Ошибка при загрузке plotly.js в окно графика")
+            return
+        self._ready = True
+        if self._pending is not None:
+            self._react(self._pending)
+            self._pending = None
+
+    def _react(self, figure_json):
+        self.page().runJavaScript(
+            f"var figure = {figure_json};"
+            # график занимает все окно, если размер не задан в самой фигуре
+            "figure.layout = figure.layout || {};"
+            "if (figure.layout.autosize === undefined) figure.layout.autosize = true;"
+            "Plotly.react('plot', figure.data, figure.layout, {responsive: true});"
+        )
+
+    def show_figure(self, fig):
+        """
+        Отображает фигуру Plotly, заменяя предыдущий график.
+
+        :param fig: plotly.graph_objects.Figure
+        """
+        self.show_json(fig.to_json())
+
+    def show_json(self, figure_json):
+        """
+        Отображает фигуру Plotly, заданную в JSON (например, из кэша готовых графиков).
+
+        :param figure_json: JSON фигуры (строка).
+        """
+        if self._ready:
+            self._react(figure_json)
+        else:
+            self._pending = figure_json  # будет показана после загрузки plotly.js
@@ -0,0 +1,134 @@
+import importlib
+import importlib.util
+
+FIGURE_LIBRARIES = ('matplotlib', 'seaborn')  # библиотеки, которые рисуют на фигуре Matplotlib
+WEB_LIBRARIES = ('plotly',)  # библиотеки, графики которых отображаются в веб-виджете
+
+
+class ChartSpec:
+    """
+    Описание построителя графика в реестре.
+
+    library - библиотека визуализации (matplotlib, seaborn, plotly);
+    plot_type - тип графика, как он показан в интерфейсе;
+    target - функция построения в виде 'модуль:функция', импортируется при первом вызове;
+    columns - оси, столбцы которых передаются функции после данных, например ('x', 'y');
+    filtered - строится ли график по данным с фильтром X (False - по всем данным);
+    binned - гистограмма: функция принимает готовые интервалы (параметры bins, method, histogram).
+    """
+
+    def __init__(self, library, plot_type, target, columns=('x', 'y'), filtered=True, binned=False):
+        self.library = library
+        self.plot_type = plot_type
+        self.target = target
+        self.columns = tuple(columns)
+        self.filtered = filtered
+        self.binned = binned
+        self._builder = None
+
+    @property
+    def builder(self):
+        # модуль с функцией построения импортируется только при первом использовании
+        if self._builder is None:
+            module_name, function_name = self.target.split(':')
+            self._builder = getattr(importlib.import_module(module_name), function_name)
+        return self._builder
+
+    @property
+    def uses_figure(self):
+        # график рисуется на фигуре Matplotlib и может быть встроен в окно приложения
+        return self.library in FIGURE_LIBRARIES
+
+    @property
+    def uses_web_view(self):
+        # график отображается средствами plotly.js во встроенном веб-виджете
+        return self.library in WEB_LIBRARIES
+
+    @property
+    def aggregatable(self):
+        # строится по выборке с осью X: перед построением Y можно свести по группам X (см. aggregation)
+        return self.filtered and 'x' in self.columns
+
+    def __call__(self, data, columns, **kwargs):
+        """
+        Строит график.
+        :param data: DataFrame с данными.
+        :param columns: Словарь 'ось -> название столбца', например {'x': 'year', 'y': 'value'}.
+        :param kwargs: Дополнительные параметры функции построения.
+        """
+        return self.builder(data, *(columns[axis] for axis in self.columns), **kwargs)
+
+
+_charts = {}  # (библиотека, тип графика) -> ChartSpec
+_available = {}  # библиотека -> установлена ли она
+
+
+def register_chart(library, plot_type, target, columns=('x', 'y'), filtered=True, binned=False):
+    """
+    Добавляет построитель графика в реестр.
+    :return: ChartSpec
+    """
+    spec = ChartSpec(library, plot_type, target, columns, filtered, binned)
+    _charts[(library, plot_type)] = spec
+    return spec
+
+
+def is_available(library):
+    """
+    Проверяет, установлена ли библиотека, не импортируя ее.
+    :param library: Название библиотеки (имя пакета).
+    """
+    if library not in _available:
+        _available[library] = importlib.util.find_spec(library) is not None
+    return _available[library]
+
+
+def libraries():
+    """
+    :return: установленные библиотеки, для которых есть построители, в порядке регистрации.
+    """
+    return [library for library in dict.fromkeys(library for library, _ in _charts) if is_available(library)]
+
+
+def plot_types(library):
+    """
+    :param library: Название библиотеки.
+    :return: типы графиков библиотеки в порядке регистрации.
+    """
+    return [plot_type for lib, plot_type in _charts if lib == library]
+
+
+def charts():
+    """
+    :return: все зарегистрированные построители (ChartSpec) в порядке регистрации.
+    """
+    return list(_charts.values())
+
+
+def get_chart(library, plot_type):
+    """
+    :return: ChartSpec для библиотеки и типа графика.
+    """
+    spec = _charts.get((library, plot_type))
+    if spec is None:
+        raise ValueError(f"Для библиотеки {library} нет графика типа {plot_type}")
+    return spec
+
+
+# Встроенные построители графиков
+_VIZ = 'source.visualizations_max'
+
+register_chart('matplotlib', 'Bar Chart', f'{_VIZ}:create_bar_chart')
+register_chart('matplotlib', 'Line Chart', f'{_VIZ}:create_line_chart')
+register_chart('matplotlib', 'Histogram', f'{_VIZ}:create_histogram', columns=('y',), binned=True)
+register_chart('matplotlib', 'Contour', f'{_VIZ}:create_contour_plot', columns=('x', 'y', 'z'), filtered=False)
+
+register_chart('seaborn', 'Bar Chart', f'{_VIZ}:create_seaborn_bar_chart')
+register_chart('seaborn', 'Line Chart', f'{_VIZ}:create_seaborn_line_chart')
+register_chart('seaborn', 'Histogram', f'{_VIZ}:create_seaborn_histogram', columns=('y',), binned=True)
+register_chart('seaborn', 'Contour', f'{_VIZ}:create_seaborn_contour_plot', columns=('x', 'y', 'z'), filtered=False)
+
+register_chart('plotly', 'Bar Chart', f'{_VIZ}:create_plotly_bar_chart')
+register_chart('plotly', 'Line Chart', f'{_VIZ}:create_plotly_line_chart')
+register_chart('plotly', 'Histogram', f'{_VIZ}:create_plotly_histogram', columns=('y',), binned=True)
+register_chart('plotly', 'Contour', f'{_VIZ}:create_plotly_contour', columns=('x', 'y', 'z'), filtered=False)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from source import data_cache
+
+RENDER_CACHE_DIR = os.path.join(data_cache.CACHE_DIR, 'renders')
+MAX_MEMORY_BYTES = 64 * 1024 ** 2  # готовые графики в памяти (64 МБ)
+MAX_DISK_BYTES = 256 * 1024 ** 2  # готовые графики на диске (256 МБ)
+KINDS = {'png': '.png', 'json': '.json'}  # изображения и JSON фигур Plotly (окно приложения кэширует только JSON)
+RENDER_CACHE_VERSION = 9  # меняется при изменении функций построения, чтобы не показывать старые графики
+
+
+def render_key(dataset_hash, library, plot_type, columns, filter_value=None, style=None):
+    """
+    Строит ключ готового графика по всем параметрам, от которых зависит результат.
+
+    :param dataset_hash: Хэш содержимого файла с данными.
+    :param library: Библиотека визуализации.
+    :param plot_type: Тип графика.
+    :param columns: Словарь 'ось -> столбец'.
+    :param filter_value: Значение фильтра по X (None - все строки).
+    :param style: Словарь дополнительных параметров построения.
+    :return: строка-ключ
+    """
+    raw = json.dumps([RENDER_CACHE_VERSION, dataset_hash, library, plot_type, columns, filter_value, style or {}],
+                     sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def dataset_hash(data, file_path):
+    """
+    :return: хэш содержимого файла; берется из load_data, если данные загружены через кэш, иначе вычисляется.
+    """
+    content_hash = data.attrs.get('content_hash') if data is not None else None
+    if content_hash is None:
+        content_hash = data_cache.file_fingerprint(file_path)['content_hash']
+    return content_hash
+
+
+class RenderCache:
+    """
+    Кэш готовых графиков с вытеснением давно не использованных записей (LRU).
+    Записи хранятся в памяти и на диске; каждый уровень ограничен своим объемом.
+    Запись - пара (вид, байты): вид 'png' или 'json'.
+    """
+
+    def __init__(self, max_memory_bytes=MAX_MEMORY_BYTES, max_disk_bytes=MAX_DISK_BYTES, cache_dir=None):
+        """
+        :param max_memory_bytes: Ограничение объема записей в памяти.
+        :param max_disk_bytes: Ограничение объема записей на диске (0 - не сохранять на диск).
+        :param cache_dir: Каталог записей на диске (по умолчанию RENDER_CACHE_DIR).
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = cache_dir or RENDER_CACHE_DIR
+        self._memory = OrderedDict()  # ключ -> (вид, байты), последние использованные - в конце
+        self._memory_bytes = 0
+
+    def _path(self, key, kind):
+        return os.path.join(self.cache_dir, key + KINDS[kind])
+
+    def get(self, key):
+        """
+        :return: (вид, байты) или None, если графика нет в кэше.
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+
+        if self.max_disk_bytes:
+            for kind in KINDS:
+                path = self._path(key, kind)
+                try:
+                    with open(path, 'rb') as f:
+                        payload = f.read()
+                except OSError:
+                    continue
+                os.utime(path)  # отметка последнего использования для LRU-очистки
+                self._remember(key, (kind, payload))
+                return kind, payload
+        return None
+
+    def put(self, key, kind, payload):
+        """
+        Сохраняет готовый график.
+
+        :param key: Ключ из render_key.
+        :param kind: 'png' или 'json'.
+        :param payload: Содержимое (bytes или str).
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Неизвестный вид записи: {kind}. Допустимые: {', '.join(KINDS)}")
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        self._remember(key, (kind, payload))
+
+        if self.max_disk_bytes and len(payload) <= self.max_disk_bytes:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path = self._path(key, kind)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(payload)
+                os.replace(path + '.tmp', path)
+                self.enforce_disk_limit()
+            except OSError as e:
+                print(f"Ошибка при записи графика в кэш: {e}")
+
+    def _remember(self, key, entry):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old[1])
+        if len(entry[1]) > self.max_memory_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_bytes += len(entry[1])
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, payload) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(payload)
+
+    def enforce_disk_limit(self):
+        """
+        Удаляет с диска давно не использованные графики сверх ограничения объема.
+
+        :return: количество удаленных файлов.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if os.path.splitext(name)[1] in KINDS.values():
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """
+        Удаляет все записи из памяти и с диска.
+        """
+        self._memory.clear()
+        self._memory_bytes = 0
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if os.path.splitext(name)[1] in KINDS.values():
+                    os.remove(os.path.join(self.cache_dir, name))
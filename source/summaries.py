@@ -0,0 +1,401 @@
+import numpy as np
+import pandas as pds
+from source.binning import Histogram, BIN_METHODS, DEFAULT_BINS, MAX_BINS
+
+SUMMARY_BINS = 1024  # число мелких интервалов гистограммы сводки (четное: при расширении интервалы сливаются парами)
+SKETCH_CAPACITY = 2048  # элементов на уровне эскиза квантилей; ошибка ранга порядка log2(n / k) / k
+
+
+class RunningStats:
+    """
+    Количество, минимум, максимум и сумма значений; обновляются по новым значениям и объединяются.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.missing = 0  # пропуски и значения, которые не являются числами
+        self.min = np.inf
+        self.max = -np.inf
+        self.sum = 0.0
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else np.nan
+
+    def update(self, values, missing=0):
+        """
+        :param values: Массив float без пропусков.
+        :param missing: Сколько значений пропущено.
+        """
+        self.missing += missing
+        if len(values):
+            self.count += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.sum += float(values.sum())
+
+    def merge(self, other):
+        self.count += other.count
+        self.missing += other.missing
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+
+    def to_array(self):
+        return np.array([self.count, self.missing, self.min, self.max, self.sum], dtype=float)
+
+    @classmethod
+    def from_array(cls, array):
+        stats = cls()
+        stats.count, stats.missing = int(array[0]), int(array[1])
+        stats.min, stats.max, stats.sum = float(array[2]), float(array[3]), float(array[4])
+        return stats
+
+
+class FixedHistogram:
+    """
+    Гистограмма с фиксированными границами, которую можно дополнять и объединять.
+
+    Интервалы имеют ширину, равную степени двойки, и начинаются с кратного ширине числа,
+    поэтому у двух гистограмм границы всегда совпадают или вкладываются друг в друга.
+    Если новые значения не помещаются в диапазон, ширина удваивается, а соседние интервалы
+    сливаются попарно - без обращения к уже учтенным значениям.
+    """
+
+    def __init__(self, bins=SUMMARY_BINS):
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.origin = 0.0
+        self.width = None  # None - значений еще не было
+
+    @property
+    def end(self):
+        return self.origin + len(self.counts) * self.width
+
+    def edges(self):
+        return self.origin + np.arange(len(self.counts) + 1) * self.width
+
+    def _start(self, low, high):
+        # первая ширина: наименьшая степень двойки, при которой [low, high] помещается в интервалы
+        n = len(self.counts)
+        span = high - low
+        self.width = 2.0 ** np.ceil(np.log2(span / n)) if span > 0 else 2.0 ** np.floor(np.log2(abs(low) or 1.0))
+        self.origin = np.floor(low / self.width) * self.width
+
+    def _grow(self, low, high, min_width=0.0):
+        """
+        Расширяет диапазон так, чтобы low >= origin, high < end и ширина была не меньше min_width.
+        """
+        width, origin = self.width, self.origin
+        n = len(self.counts)
+        old_end = self.end
+        while width < min_width or low < origin or high >= origin + n * width or old_end > origin + n * width:
+            width *= 2
+            origin = np.floor(min(low, self.origin) / width) * width
+        if width == self.width:
+            return
+        # старый интервал i попадает в новый интервал (offset + i) // factor
+        factor = int(round(width / self.width))
+        offset = int(round((self.origin - origin) / self.width))
+        index = (offset + np.arange(n)) // factor
+        self.counts = np.bincount(index, weights=self.counts, minlength=n).astype(np.int64)
+        self.width, self.origin = width, origin
+
+    def update(self, values):
+        """
+        :param values: Массив float без пропусков.
+        """
+        if not len(values):
+            return
+        low, high = values.min(), values.max()
+        if self.width is None:
+            self._start(low, high)
+        self._grow(low, high)
+        index = ((values - self.origin) / self.width).astype(np.intp)
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+    def occupied(self):
+        """
+        :return: (первый, последний + 1) номера непустых интервалов или None
+        """
+        nonzero = np.flatnonzero(self.counts)
+        if not len(nonzero):
+            return None
+        return nonzero[0], nonzero[-1] + 1
+
+    def merge(self, other):
+        occupied = other.occupied()
+        if occupied is None:
+            return
+        first, last = occupied
+        low = other.origin + first * other.width
+        high = other.origin + (last - 0.5) * other.width  # середина последнего непустого интервала
+        if self.width is None:
+            self._start(low, high)
+        self._grow(low, high, min_width=other.width)
+        # интервалы other целиком вкладываются в интервалы self
+        starts = other.origin + np.arange(first, last) * other.width
+        index = np.floor((starts - self.origin) / self.width).astype(np.intp)
+        self.counts += np.bincount(index, weights=other.counts[first:last], minlength=len(self.counts)).astype(np.int64)
+
+    def regroup(self, bins):
+        """
+        Сливает соседние интервалы в не более чем bins равных интервалов по непустому диапазону.
+
+        :return: Histogram
+        """
+        occupied = self.occupied()
+        if occupied is None:
+            return Histogram(np.linspace(0, 1, bins + 1), np.zeros(bins, dtype=np.int64))
+        first, last = occupied
+        group = int(np.ceil((last - first) / bins))
+        count = int(np.ceil((last - first) / group))
+        counts = np.zeros(count * group, dtype=np.int64)
+        counts[:last - first] = self.counts[first:last]
+        edges = self.origin + (first + np.arange(count + 1) * group) * self.width
+        return Histogram(edges, counts.reshape(count, group).sum(axis=1))
+
+    def to_array(self):
+        return np.concatenate(([self.origin, np.nan if self.width is None else self.width], self.counts))
+
+    @classmethod
+    def from_array(cls, array):
+        histogram = cls(len(array) - 2)
+        histogram.origin = float(array[0])
+        histogram.width = None if np.isnan(array[1]) else float(array[1])
+        histogram.counts = array[2:].astype(np.int64)
+        return histogram
+
+
+class QuantileSketch:
+    """
+    Эскиз квантилей (сжатие по уровням, как в KLL): на уровне h хранятся значения с весом 2^h.
+    Когда на уровне больше SKETCH_CAPACITY значений, они упорядочиваются и на следующий уровень
+    переходит каждое второе (со случайным сдвигом). Объем памяти - O(k log(n / k)),
+    эскизы объединяются сложением уровней.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def count(self):
+        return int(sum(len(level) << h for h, level in enumerate(self.levels)))
+
+    def update(self, values):
+        """
+        :param values: Массив float без пропусков.
+        """
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compact()
+
+    def merge(self, other):
+        for h, level in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate((self.levels[h], level))
+        self._compact()
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) <= self.capacity:
+                h += 1
+                continue
+            # сразу несколько сжатий: каждое step-е значение, step = 2^shift
+            shift = max(1, int(np.log2(len(items) / self.capacity)))
+            step = 1 << shift
+            items = np.sort(items)
+            used = len(items) - len(items) % step
+            kept = items[:used][self._rng.integers(step)::step]
+            while len(self.levels) <= h + shift:
+                self.levels.append(np.empty(0))
+            self.levels[h + shift] = np.concatenate((self.levels[h + shift], kept))
+            self.levels[h] = items[used:]  # остаток меньше step остается на уровне с прежним весом
+
+    def _weighted(self):
+        # все значения эскиза по возрастанию и накопленные веса
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        :param q: Доля или массив долей от 0 до 1.
+        :return: приближенные квантили
+        """
+        values, cumulative = self._weighted()
+        if not len(values):
+            return np.full(np.shape(q), np.nan)
+        position = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side='left')
+        return values[np.minimum(position, len(values) - 1)]
+
+    def rank(self, x):
+        """
+        :return: приближенное число значений меньше x (x - число или массив)
+        """
+        values, cumulative = self._weighted()
+        position = np.searchsorted(values, x, side='left')
+        return np.where(position > 0, cumulative[np.maximum(position - 1, 0)], 0) if len(values) else np.zeros(np.shape(x))
+
+    def to_arrays(self):
+        return {str(h): level for h, level in enumerate(self.levels)}
+
+    @classmethod
+    def from_arrays(cls, arrays, capacity=SKETCH_CAPACITY):
+        sketch = cls(capacity)
+        sketch.levels = [np.asarray(arrays[str(h)], dtype=float) for h in range(len(arrays))]
+        return sketch
+
+
+class ColumnSummary:
+    """
+    Сводка числового столбца: RunningStats, FixedHistogram и QuantileSketch.
+    Дополняется новыми значениями за O(число новых значений) и объединяется с другой сводкой.
+    """
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.histogram_counts = FixedHistogram()
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        """
+        :param values: Series или массив; нечисловые значения и пропуски считаются в stats.missing.
+        """
+        values = np.asarray(values, dtype=float)
+        finite = values[np.isfinite(values)]
+        self.stats.update(finite, missing=len(values) - len(finite))
+        self.histogram_counts.update(finite)
+        self.sketch.update(finite)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.histogram_counts.merge(other.histogram_counts)
+        self.sketch.merge(other.sketch)
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def histogram(self, bins=DEFAULT_BINS, method='fixed'):
+        """
+        Гистограмма по сводке, без обращения к исходным значениям.
+
+        'fixed' и 'fd' сливают мелкие интервалы сводки, поэтому частоты точные, а границы
+        кратны ширине мелких интервалов; 'quantile' берет границы и частоты из эскиза квантилей (приближенно).
+
+        :param bins: Число интервалов.
+        :param method: Одна из binning.BIN_METHODS.
+        :return: binning.Histogram
+        """
+        if method not in BIN_METHODS:
+            raise ValueError(f"Неизвестный способ разбиения: {method}. Допустимые: {', '.join(BIN_METHODS)}")
+        if method == 'quantile' and self.stats.count:
+            edges = np.unique(np.concatenate(([self.stats.min],
+                                              self.sketch.quantile(np.linspace(0, 1, bins + 1)[1:-1]),
+                                              [self.stats.max])))
+            if len(edges) > 1:
+                cumulative = np.concatenate(([0], self.sketch.rank(edges[1:-1]), [self.stats.count]))
+                return Histogram(edges, np.diff(cumulative))
+        if method == 'fd' and self.stats.count:
+            q1, q3 = self.sketch.quantile([0.25, 0.75])
+            width = 2 * (q3 - q1) / self.stats.count ** (1 / 3)
+            if width > 0:
+                bins = int(min(max(np.ceil((self.stats.max - self.stats.min) / width), 1), MAX_BINS))
+        return self.histogram_counts.regroup(bins)
+
+    def to_arrays(self, prefix):
+        arrays = {f'{prefix}stats': self.stats.to_array(), f'{prefix}hist': self.histogram_counts.to_array()}
+        arrays.update({f'{prefix}sketch{h}': level for h, level in self.sketch.to_arrays().items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        summary = cls()
+        summary.stats = RunningStats.from_array(arrays[f'{prefix}stats'])
+        summary.histogram_counts = FixedHistogram.from_array(arrays[f'{prefix}hist'])
+        levels = {name[len(prefix) + len('sketch'):]: arrays[name] for name in arrays
+                  if name.startswith(f'{prefix}sketch')}
+        summary.sketch = QuantileSketch.from_arrays(levels)
+        return summary
+
+
+def summary_columns(data):
+    """
+    :return: числовые столбцы DataFrame, для которых ведутся сводки.
+    """
+    return [column for column in data.columns if pds.api.types.is_numeric_dtype(data[column].dtype)
+            and not pds.api.types.is_bool_dtype(data[column].dtype)]
+
+
+class DatasetSummaries:
+    """
+    Сводки числовых столбцов загруженного набора данных.
+    При дописывании строк в файл сводки дополняются только новыми строками (см. append).
+    """
+
+    def __init__(self, columns=()):
+        self.columns = {column: ColumnSummary() for column in columns}
+        self.rows = 0
+
+    @classmethod
+    def from_data(cls, data, columns=None):
+        """
+        :param data: DataFrame.
+        :param columns: Столбцы для сводок (по умолчанию все числовые).
+        :return: DatasetSummaries
+        """
+        if columns is None:
+            columns = summary_columns(data)
+        summaries = cls(columns)
+        summaries.append(data)
+        return summaries
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def append(self, rows):
+        """
+        Дополняет сводки новыми строками.
+
+        :param rows: DataFrame только с новыми строками.
+        """
+        for column, summary in self.columns.items():
+            if column in rows.columns:
+                summary.update(pds.to_numeric(rows[column], errors='coerce').to_numpy(dtype=float))
+        self.rows += len(rows)
+
+    def merge(self, other):
+        """
+        Объединяет сводки двух частей набора данных (например, обработанных в разных процессах).
+        """
+        for column, summary in other.columns.items():
+            self.columns.setdefault(column, ColumnSummary()).merge(summary)
+        self.rows += other.rows
+
+    def copy(self):
+        return DatasetSummaries.from_arrays(self.to_arrays())
+
+    def to_arrays(self):
+        """
+        :return: словарь массивов для np.savez (см. data_cache.store_summaries)
+        """
+        arrays = {'rows': np.array([self.rows]), 'columns': np.array(list(self.columns), dtype=str)}
+        for i, summary in enumerate(self.columns.values()):
+            arrays.update(summary.to_arrays(f'c{i}_'))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        summaries = cls()
+        summaries.rows = int(arrays['rows'][0])
+        for i, column in enumerate(arrays['columns']):
+            summaries.columns[str(column)] = ColumnSummary.from_arrays(arrays, f'c{i}_')
+        return summaries
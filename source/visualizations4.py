@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pds
+from source.gridding import build_z_matrix
 
 graphics_list = ["Bar Chart", "Line Chart", "Histogram", "Contour"]
 
@@ -127,7 +128,7 @@ def create_histogram(data, column):
     plt.show()
 
 
-def create_contour_plot(data, x_column, y_column, z_column):
+def create_contour_plot(data, x_column, y_column, z_column, aggregate='last', resolution='auto'):
     """
     Создает контурный график с использованием Matplotlib и Pandas.
 
@@ -135,6 +136,9 @@ def create_contour_plot(data, x_column, y_column, z_column):
     :param x_column: Название колонки для оси X.
     :param y_column: Название колонки для оси Y.
     :param z_column: Название колонки для оси Z.
+    :param aggregate: Правило для повторяющихся точек (x, y): 'last', 'first', 'mean', 'sum', 'min', 'max'.
+    :param resolution: Размер сетки: None - ячейка на каждое уникальное значение, число, пара (по X, по Y)
+                       или 'auto' - уникальные значения, пока сетка укладывается в бюджет ячеек.
     """
     # Извлечение данных из DataFrame по указанным столбцам
     x_data = data[x_column].values
@@ -145,19 +149,8 @@ def create_contour_plot(data, x_column, y_column, z_column):
     if len(x_data) != len(y_data) or len(y_data) != len(z_data):
         raise ValueError("Все входные массивы должны иметь одинаковую длину.")
 
-    # Создаем DataFrame из входных данных
-    df = pds.DataFrame({'x': x_data, 'y': y_data, 'z': z_data})
-
-    # Создаем сетку для контурного графика
-    x_grid = df['x'].unique()
-    y_grid = df['y'].unique()
-
-    # Создаем матрицу Z для контурного графика
-    z_matrix = pds.DataFrame(index=sorted(y_grid), columns=sorted(x_grid))
-
-    # Заполняем матрицу Z значениями из DataFrame
-    for _, row in df.iterrows():
-        z_matrix.loc[row['y'], row['x']] = row['z']
+    # Создаем матрицу Z на сетке уникальных значений X и Y (векторно, без перебора строк)
+    z_matrix = build_z_matrix(x_data, y_data, z_data, aggregate=aggregate, resolution=resolution)
 
     # Заполняем пропуски (NaN) средними значениями соседей
     z_matrix = z_matrix.astype(float).interpolate(method='linear', axis=0).interpolate(method='linear', axis=1)
@@ -1,10 +1,9 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pds
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy.interpolate import griddata
+from source.gridding import build_z_matrix, get_interpolator
 
 graphics_list = ["Bar Chart", "Line Chart", "Histogram", "Contour"]
 
@@ -131,7 +130,7 @@ def create_histogram(data, column):
     plt.show()
 
 
-def create_contour_plot(data, x_column, y_column, z_column):
+def create_contour_plot(data, x_column, y_column, z_column, aggregate='last', resolution='auto'):
     """
     Создает контурный график с использованием Matplotlib и Pandas.
 
@@ -139,6 +138,9 @@ def create_contour_plot(data, x_column, y_column, z_column):
     :param x_column: Название колонки для оси X.
     :param y_column: Название колонки для оси Y.
     :param z_column: Название колонки для оси Z.
+    :param aggregate: Правило для повторяющихся точек (x, y): 'last', 'first', 'mean', 'sum', 'min', 'max'.
+    :param resolution: Размер сетки: None - ячейка на каждое уникальное значение, число, пара (по X, по Y)
+                       или 'auto' - уникальные значения, пока сетка укладывается в бюджет ячеек.
     """
     # Извлечение данных из DataFrame по указанным столбцам
     x_data = data[x_column].values
@@ -149,19 +151,8 @@ def create_contour_plot(data, x_column, y_column, z_column):
     if len(x_data) != len(y_data) or len(y_data) != len(z_data):
         raise ValueError("Все входные массивы должны иметь одинаковую длину.")
 
-    # Создаем DataFrame из входных данных
-    df = pds.DataFrame({'x': x_data, 'y': y_data, 'z': z_data})
-
-    # Создаем сетку для контурного графика
-    x_grid = df['x'].unique()
-    y_grid = df['y'].unique()
-
-    # Создаем матрицу Z для контурного графика
-    z_matrix = pds.DataFrame(index=sorted(y_grid), columns=sorted(x_grid))
-
-    # Заполняем матрицу Z значениями из DataFrame
-    for _, row in df.iterrows():
-        z_matrix.loc[row['y'], row['x']] = row['z']
+    # Создаем матрицу Z на сетке уникальных значений X и Y (векторно, без перебора строк)
+    z_matrix = build_z_matrix(x_data, y_data, z_data, aggregate=aggregate, resolution=resolution)
 
     # Заполняем пропуски (NaN) средними значениями соседей
     z_matrix = z_matrix.astype(float).interpolate(method='linear', axis=0).interpolate(method='linear', axis=1)
@@ -408,7 +399,8 @@ def create_plotly_histogram(data, column,
     fig.show()
 
 
-def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plot', xlabel='X-axis', ylabel='Y-axis'):
+def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plot', xlabel='X-axis', ylabel='Y-axis',
+                          resolution=100):
     """
     Создает контурный график с использованием Plotly, фильтруя данные по выбранным столбцам.
 
@@ -419,25 +411,25 @@ def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plo
     :param title: Заголовок графика.
     :param xlabel: Подпись для оси X.
     :param ylabel: Подпись для оси Y.
+    :param resolution: Размер сетки интерполяции: число узлов по каждой оси, пара (по X, по Y)
+                       или 'auto' - по числу уникальных значений в пределах бюджета ячеек.
     """
     # Фильтрация данных
     x = data[x_column].values
     y = data[y_column].values
     z = data[z_column].values
 
-    # Создание двумерной сетки для интерполяции
-    grid_x, grid_y = np.meshgrid(np.linspace(np.min(x), np.max(x), 100),
-                                 np.linspace(np.min(y), np.max(y), 100))
-
-    # Интерполяция значений Z
-    grid_z = griddata((x, y), z, (grid_x, grid_y), method='linear')
+    # Интерполяция значений Z на сетку; триангуляция точек (x, y) кэшируется
+    # и переиспользуется при смене столбца Z
+    interpolator = get_interpolator(x, y, resolution)
+    grid_z = interpolator(z)
 
     # Создание контурного графика
     fig = go.Figure(data=
     go.Contour(
         z=grid_z,
-        x=np.linspace(np.min(x), np.max(x), 100),
-        y=np.linspace(np.min(y), np.max(y), 100),
+        x=interpolator.grid_x,
+        y=interpolator.grid_y,
         colorscale='Viridis',
         colorbar=dict(title='Intensity')
     )
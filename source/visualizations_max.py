@@ -1,137 +1,269 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pds
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from scipy.interpolate import griddata
+from source.lazy_import import lazy_module
+from source.gridding import build_z_matrix, get_interpolator
+from source.grouping import CategoryGroups
+from source.downsampling import downsample, MAX_LINE_POINTS
+from source.binning import compute_histogram, DEFAULT_BINS
+
+# Библиотеки построения графиков загружаются при первом обращении (см. lazy_import)
+matplotlib = lazy_module('matplotlib')
+plt = lazy_module('matplotlib.pyplot')
+mpl_container = lazy_module('matplotlib.container')
+mpl_patches = lazy_module('matplotlib.patches')
+sns = lazy_module('seaborn')
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objects')
 
 graphics_list = ["Bar Chart", "Line Chart", "Histogram", "Contour"]
+MAX_BAR_LABELS = 200  # при большем числе столбцов подписывается только каждый k-й
+MAX_BIN_TICKS = 50  # подписей интервалов гистограммы на оси X не больше этого числа
 
-def create_bar_chart(data, x_column, y_column):
+_target_figure = None  # фигура, встроенная в окно приложения (см. set_target_figure)
+_plotly_renderer = None  # функция отображения графиков Plotly в окне приложения (см. set_plotly_renderer)
+
+
+def set_target_figure(figure):
+    """
+    Задает фигуру Matplotlib, на которой строятся графики Matplotlib и Seaborn.
+    Фигура очищается и используется повторно при каждом построении вместо создания новых окон.
+
+    :param figure: matplotlib.figure.Figure или None - каждый график в отдельном окне plt.figure.
+    """
+    global _target_figure
+    _target_figure = figure
+
+
+def _value_text(value):
+    """
+    Подпись значения над столбцом: целые числа (в том числе целые суммы в вещественном виде) - без '.0',
+    дробные - в формате :g.
+    """
+    if isinstance(value, (int, np.integer)):
+        return str(value)
+    if np.isfinite(value) and value == int(value):
+        return str(int(value))
+    return f'{value:g}'
+
+
+def _new_axes(figsize=None):
+    """
+    Подготавливает фигуру и оси для нового графика.
+
+    :param figsize: Размер отдельного окна (для встроенной фигуры не используется).
+    :return: (фигура, оси)
+    """
+    if _target_figure is not None:
+        _target_figure.clear()
+        return _target_figure, _target_figure.add_subplot()
+    figure = plt.figure(figsize=figsize)
+    return figure, figure.add_subplot()
+
+
+def _show(figure):
+    """
+    Отображает построенный график: перерисовывает встроенную фигуру или открывает окно.
+    """
+    if figure is _target_figure:
+        figure.canvas.draw_idle()
+    else:
+        plt.show()
+
+
+def set_plotly_renderer(renderer):
+    """
+    Задает функцию, которая отображает графики Plotly, например PlotlyView.show_figure.
+
+    :param renderer: Функция, принимающая plotly.graph_objects.Figure, или None - график открывается в браузере (fig.show).
+    """
+    global _plotly_renderer
+    _plotly_renderer = renderer
+
+
+def _show_plotly(fig):
+    """
+    Отображает график Plotly в окне приложения или, если оно не задано, в браузере.
+    """
+    if _plotly_renderer is not None:
+        _plotly_renderer(fig)
+    else:
+        fig.show()
+
+
+def create_bar_chart(data, x_column, y_column, show_values=True, max_labels=MAX_BAR_LABELS, series_column=None):
     """
     Создает столбчатую диаграмму функциями из Matplotlib.
 
     :param data: DataFrame с данными.
     :param x_column: Название столбца для оси X.
     :param y_column: Название столбца для оси Y.
+    :param show_values: Показать ли значения над столбцами (True/False).
+    :param max_labels: Максимальное число подписей; при большем числе столбцов подписи прореживаются.
+    :param series_column: Столбец серий: столбцы одной серии одного цвета и на одном месте в каждой категории, с легендой.
     """
-    plt.figure(figsize=(12, 8))
+    figure, ax = _new_axes(figsize=(12, 8))
 
-    # Уникальные категории по оси X
-    unique_categories = data[x_column].unique()
+    # Уникальные категории по оси X, номер категории и номер внутри категории для каждой строки
+    groups = CategoryGroups(data[x_column])
+    unique_categories = groups.categories
     num_categories = len(unique_categories)
 
-    # Вычисление ширины столбцов
-    bar_width = 0.8 / num_categories  # Уменьшаем ширину, чтобы столбцы не накладывались
-
-    # Создание смещения для столбцов
-    x_positions = []
+    if series_column is None:
+        # Вычисление ширины столбцов
+        bar_width = 0.8 / num_categories  # Уменьшаем ширину, чтобы столбцы не накладывались
 
-    for i, category in enumerate(unique_categories):
-        category_data = data[data[x_column] == category]
-        x_positions.extend(
-            [i - (bar_width * (len(category_data) - 1) / 2) + j * bar_width for j in range(len(category_data))])
+        # Создание смещения для столбцов: столбцы категории центрируются вокруг ее номера
+        x_positions = groups.codes - bar_width * (groups.category_sizes() - 1) / 2 + groups.ranks * bar_width
 
-    # Генерация массива цветов
-    color_map = pds.Series(data[y_column]).rank(method='dense').astype(int)
-    colors = plt.cm.winter(color_map / color_map.max())
+        # Генерация массива цветов
+        color_map = pds.Series(data[y_column]).rank(method='dense').astype(int)
+        colors = plt.cm.winter(color_map / color_map.max())
+    else:
+        # Столбец серии занимает в каждой категории место по номеру серии, цвет - по серии
+        series = CategoryGroups(data[series_column])
+        bar_width = 0.8 / max(len(series), 1)
+        x_positions = groups.codes - 0.4 + (series.codes + 0.5) * bar_width
+        palette = matplotlib.colormaps['tab10'].resampled(max(len(series), 1))
+        colors = palette(series.codes)
 
     # Создание столбчатой диаграммы с различными цветами и заданной шириной столбцов
-    plt.bar(x_positions, data[y_column], color=colors, width=bar_width)
+    bars = ax.bar(x_positions, data[y_column], color=colors, width=bar_width)
 
     # Настройка меток и заголовка
-    plt.xlabel(x_column, fontsize=14, fontweight='bold')
-    plt.ylabel(y_column, fontsize=14, fontweight='bold')
-    plt.title(f'Bar Chart of {y_column} vs {x_column}', fontsize=18, fontweight='bold')
+    ax.set_xlabel(x_column, fontsize=14, fontweight='bold')
+    ax.set_ylabel(y_column, fontsize=14, fontweight='bold')
+    ax.set_title(f'Bar Chart of {y_column} vs {x_column}', fontsize=18, fontweight='bold')
 
     # Настройка меток на оси X
-    plt.xticks(range(num_categories), unique_categories, rotation=45, fontsize=12)
+    ax.set_xticks(range(num_categories), unique_categories, rotation=45, fontsize=12)
 
     # Добавление сетки
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    # Добавление значений над столбцами для лучшей читаемости
-    for i, value in enumerate(data[y_column]):
-        plt.text(x_positions[i], value + 0.02 * max(data[y_column]), value, ha='center', fontsize=6, rotation=60)
+    if series_column is not None:
+        ax.legend(handles=[mpl_patches.Patch(color=palette(i), label=str(name))
+                           for i, name in enumerate(series.categories)], title=series_column)
 
-    plt.tight_layout()
-    plt.show()
+    # Добавление значений над столбцами для лучшей читаемости (одним вызовом bar_label);
+    # если столбцов больше max_labels, подписывается только каждый step-й столбец
+    if show_values and len(bars):
+        step = max(1, int(np.ceil(len(bars) / max_labels)))
+        labelled = bars if step == 1 else mpl_container.BarContainer(bars.patches[::step], datavalues=bars.datavalues[::step],
+                                                                     orientation='vertical')
+        values = data[y_column].to_numpy()[::step]
+        ax.bar_label(labelled, labels=[_value_text(value) for value in values], fontsize=6, rotation=60, padding=2)
 
+    figure.tight_layout()
+    _show(figure)
 
-def create_line_chart(data, x_column, y_column):
+
+def create_line_chart(data, x_column, y_column, max_points=MAX_LINE_POINTS, downsample_method='lttb',
+                      series_column=None):
     """
     Создает линейный график с помощью Matplotlib.
 
     :param data: DataFrame с данными.
     :param x_column: Название столбца для оси X.
     :param y_column: Название столбца для оси Y.
+    :param max_points: Максимальное число точек одной линии; длинные ряды прореживаются.
+    :param downsample_method: Метод прореживания: 'lttb', 'minmax' или None - без прореживания.
+    :param series_column: Столбец серий: по линии на серию через категории X (вместо линии на категорию).
     """
-    plt.figure(figsize=(12, 8))
-
-    unique_categories = data[x_column].unique()
-    colors = plt.cm.get_cmap('tab10', len(unique_categories))
-
+    figure, ax = _new_axes(figsize=(12, 8))
+
+    groups = CategoryGroups(data[x_column])
+    unique_categories = groups.categories
+    y_values = data[y_column].to_numpy()
+
+    if series_column is not None:
+        # Линия на каждую серию: точки в порядке категорий X
+        series = CategoryGroups(data[series_column])
+        colors = matplotlib.colormaps['tab10'].resampled(max(len(series), 1))
+        for idx, name in enumerate(series.categories):
+            rows = series.rows(idx)
+            rows = rows[np.argsort(groups.codes[rows], kind='stable')]
+            rows = rows[downsample(groups.codes[rows], y_values[rows], max_points, downsample_method)]
+            ax.plot(groups.codes[rows], y_values[rows], marker='o', color=colors(idx), label=name)
+
+        ax.set_xlabel(x_column, fontsize=14, fontweight='bold')
+        ax.set_ylabel(y_column, fontsize=14, fontweight='bold')
+        ax.set_title(f'Line Chart of {y_column} by {x_column}', fontsize=18, fontweight='bold')
+        ax.set_xticks(range(len(unique_categories)), unique_categories, rotation=45, fontsize=12)
+        ax.grid(axis='both', linestyle='--', alpha=0.7)
+        ax.legend(title=series_column)
+        figure.tight_layout()
+        _show(figure)
+        return
+
+    colors = matplotlib.colormaps['tab10'].resampled(len(unique_categories))
+    index_values = data.index.to_numpy()
     for idx, category in enumerate(unique_categories):
-        category_data = data[data[x_column] == category]
-        plt.plot(category_data.index, category_data[y_column], marker='o', color=colors(idx), label=category)
+        rows = groups.rows(idx)
+        rows = rows[downsample(index_values[rows], y_values[rows], max_points, downsample_method)]
+        ax.plot(index_values[rows], y_values[rows], marker='o', color=colors(idx), label=category)
 
-    plt.xlabel(x_column, fontsize=14, fontweight='bold')
-    plt.ylabel(y_column, fontsize=14, fontweight='bold')
-    plt.title(f'Line Chart of {y_column} by {x_column}', fontsize=18, fontweight='bold')
+    ax.set_xlabel(x_column, fontsize=14, fontweight='bold')
+    ax.set_ylabel(y_column, fontsize=14, fontweight='bold')
+    ax.set_title(f'Line Chart of {y_column} by {x_column}', fontsize=18, fontweight='bold')
 
-    # Установка меток на оси X только для уникальных категорий
+    # Установка меток на оси X только для уникальных категорий (у первой точки каждой категории)
     if len(unique_categories)>1:
-        plt.xticks(ticks=range(0, len(data), len(unique_categories)), labels=unique_categories, rotation=45, fontsize=12)
+        first_points = [index_values[groups.rows(idx)[0]] for idx in range(len(unique_categories))]
+        ax.set_xticks(first_points, unique_categories, rotation=45, fontsize=12)
     else:
-        plt.xticks(data.index, data[x_column], rotation=45, fontsize=12)
-    plt.grid(axis='both', linestyle='--', alpha=0.7)
-    plt.legend(title=x_column)
-    plt.tight_layout()
-    plt.show()
+        ax.set_xticks(data.index, data[x_column], rotation=45, fontsize=12)
+    ax.grid(axis='both', linestyle='--', alpha=0.7)
+    ax.legend(title=x_column)
+    figure.tight_layout()
+    _show(figure)
 
 
-def create_histogram(data, column):
+def create_histogram(data, column, bins=DEFAULT_BINS, method='fixed', histogram=None):
     """
     Создает гистограмму с использованием Matplotlib.
 
     :param data: DataFrame с данными.
     :param column: Название столбца для построения гистограммы.
+    :param bins: Количество интервалов.
+    :param method: Способ разбиения на интервалы (см. binning.BIN_METHODS).
+    :param histogram: Готовая гистограмма (binning.Histogram); если задана, data не используется.
     """
-    plt.figure(figsize=(12, 8))
-
-    # Разбиваем данные на интервалы и получаем частоты
-    counts, bins = pds.cut(data[column], bins=10, retbins=True)
-    counts = counts.value_counts().sort_index()
+    if histogram is None:
+        histogram = compute_histogram(data[column], bins, method)
+    figure, ax = _new_axes(figsize=(12, 8))
 
     # Преобразуем интервалы в строки для отображения
-    bin_labels = [f'{interval.left:.2f} - {interval.right:.2f}' for interval in counts.index]
+    bin_labels = histogram.labels()
+    counts = histogram.counts
 
-    # Генерация массива цветов
-    color_map = pds.Series(data[column]).rank(method='dense').astype(int)
-    colors = plt.cm.viridis(color_map / color_map.max())
+    # Цвет столбца по рангу его частоты среди интервалов (а не среди всех строк данных)
+    ranks = np.unique(counts, return_inverse=True)[1] + 1
+    colors = plt.cm.viridis(ranks / ranks.max())
 
-    # Отображение гистограммы
-    plt.bar(bin_labels, counts.values, color=colors, edgecolor='black', alpha=0.7)
+    # Отображение гистограммы: столбцы по номерам интервалов, подписи интервалов прореживаются,
+    # чтобы сотни интервалов (правило Фридмана-Диакониса) не превращались в сотни меток оси
+    bars = ax.bar(np.arange(len(counts)), counts, color=colors, edgecolor='black', alpha=0.7)
+    step = max(1, int(np.ceil(len(counts) / MAX_BIN_TICKS)))
+    ax.set_xticks(np.arange(len(counts))[::step], bin_labels[::step])
 
     # Настройка меток и заголовка
-    plt.xlabel(column, fontsize=14, fontweight='bold')
-    plt.ylabel('Frequency', fontsize=14, fontweight='bold')
-    plt.title(f'Histogram of {column}', fontsize=18, fontweight='bold')
+    ax.set_xlabel(column, fontsize=14, fontweight='bold')
+    ax.set_ylabel('Frequency', fontsize=14, fontweight='bold')
+    ax.set_title(f'Histogram of {column}', fontsize=18, fontweight='bold')
 
     # Добавление сетки
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
 
     # Добавление значений над столбцами гистограммы
-    for x, count in zip(bin_labels, counts.values):
-        plt.text(x, count + 0.02 * max(counts.values), str(count), ha='center', fontsize=10)
+    if len(counts) <= MAX_BIN_TICKS:
+        ax.bar_label(bars, fontsize=10, padding=2)
 
-    plt.xticks(rotation=45)  # Поворачиваем метки на оси X для лучшей читаемости
-    plt.tight_layout()
-    plt.show()
+    ax.tick_params(axis='x', labelrotation=45)  # Поворачиваем метки на оси X для лучшей читаемости
+    figure.tight_layout()
+    _show(figure)
 
 
-def create_contour_plot(data, x_column, y_column, z_column):
+def create_contour_plot(data, x_column, y_column, z_column, aggregate='last', resolution='auto'):
     """
     Создает контурный график с использованием Matplotlib и Pandas.
 
@@ -139,6 +271,9 @@ def create_contour_plot(data, x_column, y_column, z_column):
     :param x_column: Название колонки для оси X.
     :param y_column: Название колонки для оси Y.
     :param z_column: Название колонки для оси Z.
+    :param aggregate: Правило для повторяющихся точек (x, y): 'last', 'first', 'mean', 'sum', 'min', 'max'.
+    :param resolution: Размер сетки: None - ячейка на каждое уникальное значение, число, пара (по X, по Y)
+                       или 'auto' - уникальные значения, пока сетка укладывается в бюджет ячеек.
     """
     # Извлечение данных из DataFrame по указанным столбцам
     x_data = data[x_column].values
@@ -149,19 +284,8 @@ def create_contour_plot(data, x_column, y_column, z_column):
     if len(x_data) != len(y_data) or len(y_data) != len(z_data):
         raise ValueError("Все входные массивы должны иметь одинаковую длину.")
 
-    # Создаем DataFrame из входных данных
-    df = pds.DataFrame({'x': x_data, 'y': y_data, 'z': z_data})
-
-    # Создаем сетку для контурного графика
-    x_grid = df['x'].unique()
-    y_grid = df['y'].unique()
-
-    # Создаем матрицу Z для контурного графика
-    z_matrix = pds.DataFrame(index=sorted(y_grid), columns=sorted(x_grid))
-
-    # Заполняем матрицу Z значениями из DataFrame
-    for _, row in df.iterrows():
-        z_matrix.loc[row['y'], row['x']] = row['z']
+    # Создаем матрицу Z на сетке уникальных значений X и Y (векторно, без перебора строк)
+    z_matrix = build_z_matrix(x_data, y_data, z_data, aggregate=aggregate, resolution=resolution)
 
     # Заполняем пропуски (NaN) средними значениями соседей
     z_matrix = z_matrix.astype(float).interpolate(method='linear', axis=0).interpolate(method='linear', axis=1)
@@ -171,25 +295,41 @@ def create_contour_plot(data, x_column, y_column, z_column):
         print("Warning: There are NaN values in the z_matrix after interpolation.")
 
     # Создание контурного графика
-    plt.figure(figsize=(10, 6))
-    contour = plt.contourf(z_matrix.columns, z_matrix.index, z_matrix.values, levels=15, cmap='viridis')
-    plt.colorbar(contour)
-    plt.title('Contour Plot')
-    plt.xlabel('X Axis')
-    plt.ylabel('Y Axis')
-    plt.show()
+    figure, ax = _new_axes(figsize=(10, 6))
+    contour = ax.contourf(z_matrix.columns, z_matrix.index, z_matrix.values, levels=15, cmap='viridis')
+    figure.colorbar(contour, ax=ax)
+    ax.set_title('Contour Plot')
+    ax.set_xlabel('X Axis')
+    ax.set_ylabel('Y Axis')
+    _show(figure)
 
 
-def create_seaborn_line_chart(data, x_column, y_column):
+def create_seaborn_line_chart(data, x_column, y_column, max_points=MAX_LINE_POINTS, downsample_method='lttb',
+                              series_column=None):
     """
     Создает линейный график с использованием Seaborn.
+    Если у числовой оси X больше max_points уникальных значений, прореживается линия средних
+    значений Y (та, что рисует Seaborn), и доверительный интервал не строится.
 
     :param data: DataFrame с данными.
     :param x_column: Название колонки для оси X.
     :param y_column: Название колонки для оси Y.
+    :param max_points: Максимальное число точек одной линии; длинные ряды прореживаются.
+    :param downsample_method: Метод прореживания: 'lttb', 'minmax' или None - без прореживания.
+    :param series_column: Столбец серий: по линии на серию (hue) с легендой.
     """
+    figure, ax = _new_axes()
+
     # Создаем линейный график
-    line_chart = sns.lineplot(data=data, x=x_column, y=y_column)
+    if series_column is not None:
+        line_chart = sns.lineplot(data=data, x=x_column, y=y_column, hue=series_column, ax=ax)
+    elif downsample_method is not None and pds.api.types.is_numeric_dtype(data[x_column]) \
+            and data[x_column].nunique() > max_points:
+        line = data.groupby(x_column)[y_column].mean()
+        points = downsample(line.index.to_numpy(), line.to_numpy(), max_points, downsample_method)
+        line_chart = sns.lineplot(x=line.index.to_numpy()[points], y=line.to_numpy()[points], ax=ax)
+    else:
+        line_chart = sns.lineplot(data=data, x=x_column, y=y_column, ax=ax)
 
     # Настраиваем заголовок и подписи осей
     line_chart.set_title(f'Line Chart of {y_column} vs {x_column}')
@@ -197,14 +337,14 @@ def create_seaborn_line_chart(data, x_column, y_column):
     line_chart.set_ylabel(y_column)
 
     # Показываем график
-    plt.show()
+    _show(figure)
 
 
 def create_seaborn_bar_chart(data, x_column, y_column,
                              color_palette='winter', show_values=True,
                              title=None, xlabel=None, ylabel=None,
                              figsize=(12, 8), value_format='.0f',
-                             xticks_rotation=45):
+                             xticks_rotation=45, series_column=None):
     """
     Создает столбчатый график с использованием Seaborn с возможностью настройки.
 
@@ -219,23 +359,27 @@ def create_seaborn_bar_chart(data, x_column, y_column,
     :param figsize: Размер графика (ширина, высота).
     :param value_format: Формат отображения значений над столбцами.
     :param xticks_rotation: Угол поворота подписей оси X.
+    :param series_column: Столбец серий для hue (вместо номера строки внутри категории), с легендой.
     """
     # Устанавливаем размер графика
-    plt.figure(figsize=figsize)
+    figure, ax = _new_axes(figsize=figsize)
 
-    # Определяем уникальные подкатегории для hue
-    data['Subcategory'] = data.groupby(x_column).cumcount()  # Создаем подкатегории для группировки
+    hue = series_column
+    if hue is None:
+        # Определяем уникальные подкатегории для hue (в новом DataFrame, исходные данные не изменяются)
+        data = data.assign(Subcategory=CategoryGroups(data[x_column]).ranks)  # Создаем подкатегории для группировки
+        hue = 'Subcategory'
 
     # Создаем столбчатый график с hue для группировки
-    bar_chart = sns.barplot(data=data, x=x_column, y=y_column, hue='Subcategory', palette=color_palette)
+    bar_chart = sns.barplot(data=data, x=x_column, y=y_column, hue=hue, palette=color_palette, ax=ax)
 
     # Устанавливаем заголовок и подписи осей
-    plt.title(title if title else f'Bar Chart of {y_column} vs {x_column}', fontsize=18, fontweight='bold')
-    plt.xlabel(xlabel if xlabel else x_column, fontsize=14, fontweight='bold')
-    plt.ylabel(ylabel if ylabel else y_column, fontsize=14, fontweight='bold')
+    ax.set_title(title if title else f'Bar Chart of {y_column} vs {x_column}', fontsize=18, fontweight='bold')
+    ax.set_xlabel(xlabel if xlabel else x_column, fontsize=14, fontweight='bold')
+    ax.set_ylabel(ylabel if ylabel else y_column, fontsize=14, fontweight='bold')
 
     # Настраиваем поворот подписей осей
-    plt.xticks(rotation=xticks_rotation, fontsize=12)
+    ax.tick_params(axis='x', labelrotation=xticks_rotation, labelsize=12)
 
     # Если необходимо, показываем значения над столбцами
     if show_values:
@@ -245,16 +389,16 @@ def create_seaborn_bar_chart(data, x_column, y_column,
                                ha='center', va='bottom', fontsize=10, rotation=60)
 
     # Добавляем сетку
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
 
     # Показываем график
-    plt.tight_layout()  # Автоматически подгоняет параметры, чтобы избежать наложения
-    plt.show()
+    figure.tight_layout()  # Автоматически подгоняет параметры, чтобы избежать наложения
+    _show(figure)
 
 
 def create_seaborn_histogram(data, column,
-                             bins=10, color='blue', kde=True, alpha=0.6,
-                             title=None, xlabel=None, ylabel='Frequency'):
+                             bins=DEFAULT_BINS, color='blue', kde=True, alpha=0.6,
+                             title=None, xlabel=None, ylabel='Frequency', method='fixed', histogram=None):
     """
     Создает гистограмму с использованием Seaborn с возможностью настройки.
 
@@ -267,21 +411,30 @@ def create_seaborn_histogram(data, column,
     :param title: Заголовок графика.
     :param xlabel: Подпись для оси X.
     :param ylabel: Подпись для оси Y.
+    :param method: Способ разбиения на интервалы (см. binning.BIN_METHODS).
+    :param histogram: Готовая гистограмма (binning.Histogram); если задана, data не используется.
     """
-    # Создаем гистограмму
-    histogram = sns.histplot(data[column], bins=bins, color=color, kde=kde, alpha=alpha)
+    if histogram is None:
+        histogram = compute_histogram(data[column], bins, method)
+    figure, ax = _new_axes()
+
+    # Создаем гистограмму по готовым интервалам: каждый интервал - одна точка в его центре
+    # с весом, равным частоте (кривая плотности строится по тем же взвешенным точкам)
+    bars = pds.DataFrame({column: histogram.centers, 'count': histogram.counts})
+    sns.histplot(data=bars, x=column, weights='count', bins=histogram.edges.tolist(),
+                 color=color, kde=kde and len(histogram) > 1, alpha=alpha, ax=ax)
 
     # Настраиваем заголовок и подписи осей
     if title:
-        histogram.set_title(title)
+        ax.set_title(title)
     else:
-        histogram.set_title(f'Histogram of {column}')
+        ax.set_title(f'Histogram of {column}')
 
-    histogram.set_xlabel(xlabel if xlabel else column)
-    histogram.set_ylabel(ylabel)
+    ax.set_xlabel(xlabel if xlabel else column)
+    ax.set_ylabel(ylabel)
 
     # Показываем график
-    plt.show()
+    _show(figure)
 
 
 def create_seaborn_contour_plot(data, x_column, y_column, z_column,
@@ -303,11 +456,13 @@ def create_seaborn_contour_plot(data, x_column, y_column, z_column,
     :param ylabel: Подпись для оси Y.
     :param colorbar_label: Подпись для цветовой шкалы.
     """
+    figure, ax = _new_axes()
+
     # Создаем контурный график
-    contour_plot = sns.kdeplot(data=data, x=x_column, y=y_column, cmap=cmap, fill=True, levels=contour_levels)
+    contour_plot = sns.kdeplot(data=data, x=x_column, y=y_column, cmap=cmap, fill=True, levels=contour_levels, ax=ax)
 
     # Добавляем точки с высотой
-    scatter = plt.scatter(data[x_column], data[y_column], c=data[z_column], cmap=cmap, edgecolor='w',
+    scatter = ax.scatter(data[x_column], data[y_column], c=data[z_column], cmap=cmap, edgecolor='w',
                           s=point_size, alpha=alpha)
 
     # Настраиваем заголовок и подписи осей
@@ -321,16 +476,17 @@ def create_seaborn_contour_plot(data, x_column, y_column, z_column,
 
     # Добавляем цветовую шкалу
     if colorbar_label:
-        cbar = plt.colorbar(scatter)
+        cbar = figure.colorbar(scatter, ax=ax)
         cbar.set_label(colorbar_label)
     else:
-        plt.colorbar(scatter, label=z_column)
+        figure.colorbar(scatter, ax=ax, label=z_column)
 
     # Показываем график
-    plt.show()
+    _show(figure)
 
 
-def create_plotly_line_chart(data, x_column, y_column):
+def create_plotly_line_chart(data, x_column, y_column, max_points=MAX_LINE_POINTS, downsample_method='lttb',
+                             series_column=None):
     """
     Создает линейный график с использованием Plotly с возможностью настройки.
     Строит линии отдельно для каждой категории, отображая их друг за другом.
@@ -338,24 +494,36 @@ def create_plotly_line_chart(data, x_column, y_column):
     :param data: DataFrame с данными.
     :param x_column: Название колонки для оси X.
     :param y_column: Название колонки для оси Y.
+    :param max_points: Максимальное число точек одной линии; длинные ряды прореживаются.
+    :param downsample_method: Метод прореживания: 'lttb', 'minmax' или None - без прореживания.
+    :param series_column: Столбец серий: по линии на серию через категории X (вместо линии на категорию).
     """
     # Создаем фигуру
     fig = go.Figure()
 
     # Получаем уникальные категории
-    unique_categories = data[x_column].unique()
-    category_indices = {category: idx for idx, category in enumerate(unique_categories)}
-
-    # Добавляем линии для каждой категории
-    for category in unique_categories:
-        category_data = data[data[x_column] == category]
-        # Используем индексы с небольшим смещением для отображения точек
-        x_values = [category_indices[category] + (i - len(category_data) / 2) * 0.1 for i in range(len(category_data))]
-        y_values = category_data[y_column].values
-
+    groups = CategoryGroups(data[x_column])
+    unique_categories = groups.categories
+    y_positions = data[y_column].to_numpy()
+
+    if series_column is None:
+        # Используем номера категорий с небольшим смещением для отображения точек
+        x_positions = groups.codes + (groups.ranks - groups.category_sizes() / 2) * 0.1
+        lines = groups
+    else:
+        # Линия на каждую серию: точки в порядке категорий X
+        x_positions = groups.codes
+        lines = CategoryGroups(data[series_column])
+
+    # Добавляем линии для каждой категории (или серии)
+    for i, category in enumerate(lines.categories):
+        rows = lines.rows(i)
+        if series_column is not None:
+            rows = rows[np.argsort(x_positions[rows], kind='stable')]
+        rows = rows[downsample(x_positions[rows], y_positions[rows], max_points, downsample_method)]
         fig.add_trace(go.Scatter(
-            x=x_values,  # Используем смещенные значения по оси X
-            y=y_values,  # Значения по оси Y
+            x=x_positions[rows],  # Используем смещенные значения по оси X
+            y=y_positions[rows],  # Значения по оси Y
             mode='lines+markers',  # Режим отображения: линии и маркеры
             name=str(category)  # Название для легенды
         ))
@@ -365,20 +533,21 @@ def create_plotly_line_chart(data, x_column, y_column):
         title=f'Line Chart of {y_column} by {x_column}',
         xaxis_title=x_column,
         yaxis_title=y_column,
-        xaxis=dict(tickvals=list(range(len(unique_categories))), ticktext=unique_categories),  # Установка меток по оси X
-        showlegend=True  # Показывать легенду
+        xaxis=dict(tickvals=list(range(len(unique_categories))), ticktext=[str(category) for category in unique_categories]),  # Установка меток по оси X
+        showlegend=True,  # Показывать легенду
+        legend_title_text=series_column
     )
 
     # Добавляем сетку
     fig.update_xaxes(showgrid=True)
     fig.update_yaxes(showgrid=True)
 
-    fig.show()
+    _show_plotly(fig)
 
 
 def create_plotly_bar_chart(data, x_column, y_column,
                             show_values=True,
-                            title=None, xlabel=None, ylabel=None):
+                            title=None, xlabel=None, ylabel=None, series_column=None):
     """
     Создает столбчатый график с использованием Plotly с возможностью настройки.
 
@@ -389,52 +558,58 @@ def create_plotly_bar_chart(data, x_column, y_column,
     :param title: Заголовок графика.
     :param xlabel: Подпись для оси X.
     :param ylabel: Подпись для оси Y.
+    :param series_column: Столбец серий: след на каждую серию, столбцы серий группируются в категориях X.
     """
     # Создаем фигуру
     fig = go.Figure()
 
-    # Получаем уникальные категории
-    unique_categories = data[x_column].unique()
-
-    # Определяем ширину столбцов
-    bar_width = 0.1  # Ширина столбцов
-    offset = bar_width * (len(unique_categories) // 2)  # Смещение для центрирования
-
-    # Добавляем столбцы для каждого значения в категории
-    for i, category in enumerate(unique_categories):
-        filtered_data = data[data[x_column] == category]
-        for j, value in enumerate(filtered_data[y_column]):
-            # Смещение по оси X для каждого столбца
-            x_position = i + j * bar_width
-            fig.add_trace(go.Bar(
-                x=[x_position],  # Уникальное значение по оси X
-                y=[value],  # Значение по оси Y
-                name=str(category),  # Название для легенды
-                width=bar_width,
-            ))
-
-            # Добавляем значение над столбцом
-            if show_values:
-                fig.add_annotation(x=x_position,
-                                   y=value,
-                                   text=str(value),
-                                   showarrow=False,
-                                   font=dict(size=10),
-                                   yshift=5)  # Сдвиг по оси Y для размещения над столбцом
+    # Номер категории для каждой строки (в порядке появления, как у unique())
+    # и порядковый номер строки внутри своей категории
+    groups = CategoryGroups(data[x_column])
+    unique_categories = groups.categories
+
+    y_values = data[y_column].to_numpy()
+    if series_column is None:
+        # Определяем ширину столбцов
+        bar_width = 0.1  # Ширина столбцов
+
+        # Смещение по оси X для каждого столбца
+        x_positions = groups.codes + groups.ranks * bar_width
+        traces = groups
+    else:
+        # След на каждую серию: столбцы серий в одной категории Plotly располагает рядом (barmode='group')
+        bar_width = None
+        x_positions = groups.codes
+        traces = CategoryGroups(data[series_column])
+
+    # Один след на категорию (или серию): все ее столбцы и подписи значений передаются массивами
+    for i, category in enumerate(traces.categories):
+        rows = traces.rows(i)
+        fig.add_trace(go.Bar(
+            x=x_positions[rows],  # Позиции столбцов категории
+            y=y_values[rows],  # Значения по оси Y
+            name=str(category),  # Название для легенды
+            width=bar_width,
+            text=[_value_text(value) for value in y_values[rows]] if show_values else None,  # Значения над столбцами
+            textposition='outside',
+            textfont=dict(size=10),
+        ))
 
     # Настройки графика
     fig.update_layout(title=title if title else f'Bar Chart of {y_column} vs {x_column}',
                       xaxis_title=xlabel if xlabel else x_column,
                       yaxis_title=ylabel if ylabel else y_column,
                       xaxis=dict(tickvals=list(range(len(unique_categories)))),  # Установка меток по оси X
-                      xaxis_ticktext=unique_categories,  # Метки для категорий
+                      xaxis_ticktext=[str(category) for category in unique_categories],  # Метки для категорий
                       barmode='group',  # Группировка столбцов
-                      bargap=0.05)  # Зазор между группами
+                      bargap=0.05,  # Зазор между группами
+                      legend_title_text=series_column)
 
-    fig.show()
+    _show_plotly(fig)
 
 
-def create_plotly_histogram(data, column, bins=10, title=None, xlabel=None, ylabel='Frequency'):
+def create_plotly_histogram(data, column, bins=DEFAULT_BINS, title=None, xlabel=None, ylabel='Frequency',
+                            method='fixed', histogram=None):
     """
     Создает гистограмму с использованием Plotly с возможностью настройки.
 
@@ -444,50 +619,45 @@ def create_plotly_histogram(data, column, bins=10, title=None, xlabel=None, ylab
     :param title: Заголовок графика.
     :param xlabel: Подпись для оси X.
     :param ylabel: Подпись для оси Y.
+    :param method: Способ разбиения на интервалы (см. binning.BIN_METHODS).
+    :param histogram: Готовая гистограмма (binning.Histogram); если задана, data не используется.
     """
-
-    # Преобразуем столбец в числовой формат, игнорируя ошибки
-    data[column] = pds.to_numeric(data[column], errors='coerce')
-
-    # Проверяем, что данные в указанном столбце числовые
-    if not pds.api.types.is_numeric_dtype(data[column]):
-        raise ValueError(f"Column '{column}' must be numeric.")
-
-    # Удаляем NaN значения
-    clean_data = data[column].dropna()
-
-    # Разбиваем данные на интервалы
-    counts, bin_edges = np.histogram(clean_data, bins=bins)
+    if histogram is None:
+        # Проверяем, что данные в указанном столбце числовые (исходные данные не изменяются)
+        values = pds.to_numeric(data[column], errors='coerce')
+        if not pds.api.types.is_numeric_dtype(values):
+            raise ValueError(f"Column '{column}' must be numeric.")
+        histogram = compute_histogram(values, bins, method)
 
     # Преобразуем интервалы в строки для отображения
-    bin_labels = [f'{bin_edges[i]:.2f} - {bin_edges[i + 1]:.2f}' for i in range(len(bin_edges) - 1)]
+    bin_labels = histogram.labels()
+    counts = histogram.counts
 
     # Генерация массива цветов
     color_indices = np.linspace(0, 1, len(counts))
     colors = [px.colors.sequential.Plasma[int(i * (len(px.colors.sequential.Plasma) - 1))] for i in color_indices]
 
-    # Создаем фигуру
-    fig = px.bar(x=bin_labels, y=counts, color_discrete_sequence=colors,
-                 title=title if title else f'Histogram of {column}')
+    # Создаем фигуру; значения выводятся над столбцами
+    fig = go.Figure(go.Bar(x=bin_labels, y=counts, marker_color=colors,
+                           text=counts if len(counts) <= MAX_BIN_TICKS else None,
+                           textposition='outside', textfont=dict(size=10)))
+    fig.update_layout(title=title if title else f'Histogram of {column}')
 
     # Настраиваем метки осей
     fig.update_layout(xaxis_title=xlabel if xlabel else column,
                       yaxis_title=ylabel,
                       xaxis_tickangle=-45)  # Поворачиваем метки на оси X для лучшей читаемости
 
-    # Добавляем значения над столбцами
-    for x, count in zip(bin_labels, counts):
-        fig.add_annotation(x=x, y=count + 0.02 * max(counts), text=str(count), showarrow=False, font=dict(size=10))
-
     # Добавляем сетку
     fig.update_xaxes(showgrid=True)
     fig.update_yaxes(showgrid=True)
 
     # Показываем график
-    fig.show()
+    _show_plotly(fig)
 
 
-def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plot', xlabel='X-axis', ylabel='Y-axis'):
+def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plot', xlabel='X-axis', ylabel='Y-axis',
+                          resolution='auto'):
     """
     Создает контурный график с использованием Plotly, фильтруя данные по выбранным столбцам.
 
@@ -498,25 +668,25 @@ def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plo
     :param title: Заголовок графика.
     :param xlabel: Подпись для оси X.
     :param ylabel: Подпись для оси Y.
+    :param resolution: Размер сетки интерполяции: число узлов по каждой оси, пара (по X, по Y)
+                       или 'auto' - по числу уникальных значений в пределах бюджета ячеек.
     """
     # Фильтрация данных
     x = data[x_column].values
     y = data[y_column].values
     z = data[z_column].values
 
-    # Создание двумерной сетки для интерполяции
-    grid_x, grid_y = np.meshgrid(np.linspace(np.min(x), np.max(x), 100),
-                                 np.linspace(np.min(y), np.max(y), 100))
-
-    # Интерполяция значений Z
-    grid_z = griddata((x, y), z, (grid_x, grid_y), method='linear')
+    # Интерполяция значений Z на сетку; триангуляция точек (x, y) кэшируется
+    # и переиспользуется при смене столбца Z
+    interpolator = get_interpolator(x, y, resolution)
+    grid_z = interpolator(z)
 
     # Создание контурного графика
     fig = go.Figure(data=
     go.Contour(
         z=grid_z,
-        x=np.linspace(np.min(x), np.max(x), 100),
-        y=np.linspace(np.min(y), np.max(y), 100),
+        x=interpolator.grid_x,
+        y=interpolator.grid_y,
         colorscale='Viridis',
         colorbar=dict(title='Intensity')
     )
@@ -526,5 +696,5 @@ def create_plotly_contour(data, x_column, y_column, z_column, title='Contour Plo
                       xaxis_title=xlabel,
                       yaxis_title=ylabel)
 
-    fig.show()
+    _show_plotly(fig)
 
@@ -0,0 +1,61 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from source.data_processing import load_data, can_pivot, pivot_wide_cached
+
+
+class LoadCancelled(Exception):
+    """
+    Загрузка данных отменена пользователем.
+    """
+
+
+class DataLoadWorker(QThread):
+    """
+    Загружает файл с данными в отдельном потоке, не блокируя интерфейс.
+
+    Сигналы:
+    progress(done, total) - прочитано байт; total == 0, если объем заранее неизвестен.
+    loaded(DataFrame) - данные загружены.
+    failed(str) - ошибка при загрузке.
+    cancelled() - загрузка отменена.
+    """
+    progress = pyqtSignal('qint64', 'qint64')  # байты: файлы больше 2 ГБ не помещаются в int
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            data = load_data(self.file_path, progress=self._report_progress)
+            self._check_cancelled()
+            if can_pivot(data):
+                pivot_wide_cached(data)  # широкая таблица строится здесь, окно возьмет ее из кэша
+                self._check_cancelled()
+        except LoadCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        # отмена могла прийти уже после чтения файла (например, при загрузке из кэша)
+        if self.isInterruptionRequested():
+            self.cancelled.emit()
+        else:
+            self.loaded.emit(data)
+
+    def cancel(self):
+        # чтение прерывается при следующем обращении к файлу или на границе этапов загрузки
+        self.requestInterruption()
+
+    def _check_cancelled(self):
+        # между этапами загрузки (хэширование, чтение, сжатие типов, широкая таблица)
+        if self.isInterruptionRequested():
+            raise LoadCancelled()
+
+    def _report_progress(self, done, total):
+        self._check_cancelled()
+        self.progress.emit(done, total)